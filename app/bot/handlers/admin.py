@@ -2,6 +2,7 @@
 from aiogram import Router, types
 from aiogram.filters import Command
 # Внутренние модули
+from app.storage.geocode_cache import get_geocode_cache
 from app.settings.config import get_config
 
 
@@ -119,9 +120,12 @@ async def view_gis_key(message: types.Message):
         await message.answer("❌ У вас нет прав для выполнения этой команды")
         return
 
+    cache_stats = get_geocode_cache().stats()
+
     await message.answer(
         f"Текущий ключ 2GIS: {config.GIS_KEY}\n"
-        f"Использовано раз: {config.COUNT_USED_GIS_KEY}"
+        f"Использовано раз: {config.COUNT_USED_GIS_KEY}\n"
+        f"Кэш адресов: {cache_stats['size']} (попаданий: {cache_stats['hits']}, промахов: {cache_stats['misses']})"
     )
 
 @router.message(Command("gis_key_update"))
@@ -0,0 +1,144 @@
+# Внешние зависимости
+from typing import Optional
+import threading
+import time
+import requests
+# Внутренние модули
+from app.parsers.get_cookies import init_session_with_cookies
+from app.parsers.user_agents import get_user_agent_provider
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+class CookieBroker:
+    """Единый источник антибот-кук kad.arbitr.ru: кэширует их, обновляет заранее и выдает сессии.
+
+    Сессии получают user-agent браузера, которым куки были получены
+    """
+    URL = "https://kad.arbitr.ru/"
+    REQUIRED_COOKIES = ['pr_fp', 'rcid', 'wasm']
+
+    # Коды ответа, по которым куки считаются устаревшими
+    STALE_STATUS_CODES = (401, 403)
+
+    def __init__(self, ttl: int, refresh_margin: int):
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+
+        self._lock = threading.Lock()
+        self._cookies: Optional[requests.cookies.RequestsCookieJar] = None
+        self._user_agent = get_user_agent_provider().random()
+        self._expires_at = 0.0
+        self._generation = 0
+        self._used_since_mint = False
+        self._timer: Optional[threading.Timer] = None
+
+    def _get_expires_at(self, cookies: requests.cookies.RequestsCookieJar) -> float:
+        """Срок жизни набора кук: самая ранняя из нужных кук, но не дольше ttl"""
+        expires_at = time.time() + self.ttl
+
+        for cookie in cookies:
+            if cookie.name in self.REQUIRED_COOKIES and cookie.expires:
+                expires_at = min(expires_at, cookie.expires)
+
+        return expires_at
+
+    def _mint(self):
+        """Получает новые куки через браузер. Вызывается под блокировкой"""
+        config.logger.info("Получаем новые антибот-куки через браузер")
+
+        session = init_session_with_cookies(url=self.URL, wait_for_cookies=self.REQUIRED_COOKIES)
+
+        self._cookies = session.cookies
+        self._user_agent = session.headers.get("User-Agent", self._user_agent)
+        self._expires_at = self._get_expires_at(session.cookies)
+        self._generation += 1
+        self._used_since_mint = False
+        self._schedule_refresh()
+
+        config.logger.info(
+            f"Антибот-куки получены (поколение {self._generation}), "
+            f"действуют {int(self._expires_at - time.time())} сек"
+        )
+
+    def _schedule_refresh(self):
+        """Планирует фоновое обновление кук до истечения их срока"""
+        if self._timer is not None:
+            self._timer.cancel()
+
+        delay = max(self._expires_at - time.time() - self.refresh_margin, 1)
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            # Куками никто не пользовался - не запускаем браузер зря
+            if not self._used_since_mint:
+                self._cookies = None
+                return
+
+            try:
+                self._mint()
+
+            except Exception as err:
+                config.logger.error(f"Ошибка фонового обновления антибот-кук: {err}")
+
+    def _get_cookies(self) -> requests.cookies.RequestsCookieJar:
+        """Актуальный набор кук. Вызывается под блокировкой"""
+        if self._cookies is None or time.time() >= self._expires_at:
+            self._mint()
+        else:
+            # Использованием считаются только обращения после получения кук: вызов, ради которого
+            # куки получены, не должен мешать фоновому обновлению пропустить простой
+            self._used_since_mint = True
+
+        return self._cookies.copy()
+
+    def get_session(self) -> requests.Session:
+        """Новая requests сессия с актуальными куками"""
+        session = requests.Session()
+
+        with self._lock:
+            session.cookies.update(self._get_cookies())
+            session.headers["User-Agent"] = self._user_agent
+            session.cookie_generation = self._generation
+
+        return session
+
+    def renew(self, session: requests.Session):
+        """Заменяет устаревшие куки в сессии. Браузер запускается один раз на поколение кук"""
+        with self._lock:
+            # Куки уже обновил другой поток - просто берем свежие
+            if getattr(session, "cookie_generation", None) == self._generation:
+                config.logger.info("Антибот-куки устарели, получаем новые")
+                self._cookies = None
+
+            cookies = self._get_cookies()
+            session.headers["User-Agent"] = self._user_agent
+            session.cookie_generation = self._generation
+
+        session.cookies.clear()
+        session.cookies.update(cookies)
+
+    def is_stale(self, response: requests.Response) -> bool:
+        """Признак устаревших кук по ответу сервера"""
+        return response.status_code in self.STALE_STATUS_CODES
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_cookie_broker() -> CookieBroker:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = CookieBroker(
+                ttl=config.COOKIE_TTL_SECONDS,
+                refresh_margin=config.COOKIE_REFRESH_MARGIN_SECONDS
+            )
+
+    return _instance
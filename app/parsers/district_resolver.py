@@ -0,0 +1,241 @@
+# Внешние зависимости
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+import json
+import re
+import threading
+# Внутренние модули
+from app.storage.geocode_cache import get_geocode_cache, normalize_address
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+SEED_PATH = Path(__file__).resolve().parent.parent / "data" / "spb_districts.json"
+
+CITY = "санкт-петербург"
+
+# Город целым словом: "Санкт-Петербургское шоссе" в области к городу не относится
+_CITY_PATTERN = re.compile(r"\bсанкт-петербург\b")
+_REGION_PATTERN = re.compile(r"\bленинградская обл")
+
+# Индексы Санкт-Петербурга
+_POSTCODE_PATTERN = re.compile(r"\b(19\d{4})\b")
+
+# Номер дома и все, что после него: остаток нормализованного адреса - город и улица
+_HOUSE_PATTERN = re.compile(r"\sд\s.*$")
+_NUMBER_TAIL_PATTERN = re.compile(r"\s\d+\S*$")
+
+# Номер дома без корпуса и литеры: "д 12", "д 12а", "... ул ленина 5/2"
+_HOUSE_NUMBER_PATTERN = re.compile(r"\sд\s(\d+)|\s(\d+)\S*$")
+
+# Слова перед или после названия населенного пункта в нормализованном адресе (поселок/пос -> п, город -> г)
+_SETTLEMENT_MARKERS = {"г", "п", "пгт"}
+
+# Типы улиц: "саперный пер" и "ул александровская" - улицы, а не поселки
+_STREET_TYPES = {
+    "ул", "пр", "пер", "наб", "б-р", "ш", "пл", "площадь", "линия", "аллея", "проезд", "пр-д", "тупик", "дорога"
+}
+
+
+def get_street_key(key: str) -> Optional[str]:
+    """Город и улица из нормализованного адреса, без дома"""
+    street = _HOUSE_PATTERN.sub("", key)
+    if street == key:
+        street = _NUMBER_TAIL_PATTERN.sub("", key)
+
+    street = street.strip()
+
+    # Один город без улицы районом не определяется
+    if not street or street == CITY:
+        return None
+
+    return street
+
+
+def get_house_number(key: str) -> Optional[int]:
+    """Номер дома из нормализованного адреса"""
+    match = _HOUSE_NUMBER_PATTERN.search(key)
+    if match is None:
+        return None
+
+    return int(match.group(1) or match.group(2))
+
+
+def _is_settlement(key: str, start: int, end: int) -> bool:
+    """Стоит ли название из справочника населенных пунктов на месте населенного пункта, а не улицы"""
+    before = key[:start].split()[-1:]
+    after = key[end:].split()[:2]
+
+    if before and before[0] in _SETTLEMENT_MARKERS or after and after[0] in _SETTLEMENT_MARKERS:
+        return True
+
+    if before and before[0] in _STREET_TYPES:
+        return False
+
+    # "саперный пер д 10" - улица; "красное село пр ленина" - за типом идет уже следующая улица
+    if after and after[0] in _STREET_TYPES:
+        return len(after) == 2 and after[1] != "д" and not after[1][0].isdigit()
+
+    return True
+
+
+def _is_city_address(key: str, postcode: Optional[str]) -> bool:
+    if _REGION_PATTERN.search(key):
+        return False
+
+    return postcode is not None or _CITY_PATTERN.search(key) is not None
+
+
+class DistrictResolver:
+    """Офлайн-определение района Санкт-Петербурга: населенный пункт, индекс, ранее найденные дома.
+
+    Дом определяется, если 2GIS уже отнес его к району, или если он лежит между двумя домами
+    той же стороны улицы из одного района. Неоднозначные адреса не определяются - для них
+    остается запрос к 2GIS
+    """
+
+    def __init__(self, towns: Dict[str, str], postcodes: Dict[str, str], min_observations: int):
+        self.towns = towns
+        self.postcodes = postcodes
+        self.min_observations = min_observations
+
+        self._town_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(town) for town in sorted(towns, key=len, reverse=True)) + r")\b"
+        ) if towns else None
+
+        self._lock = threading.Lock()
+        # Улица -> номер дома -> сколько раз 2GIS отнес дом к каждому району
+        self._streets: Dict[str, Dict[int, Counter]] = defaultdict(lambda: defaultdict(Counter))
+
+    @classmethod
+    def build(cls, seed_path: Path, known: Iterable[Tuple[str, str]], min_observations: int) -> "DistrictResolver":
+        """Собирает индекс из справочника и уже определенных 2GIS адресов"""
+        with open(seed_path, 'r', encoding='utf-8') as f:
+            seed = json.load(f)
+
+        towns = {town: district for district, names in seed["towns"].items() for town in names}
+        postcodes = {code: district for district, codes in seed["postcodes"].items() for code in codes}
+
+        resolver = cls(towns=towns, postcodes=postcodes, min_observations=min_observations)
+
+        learned = 0
+        for address, district in known:
+            resolver.learn(address, district)
+            learned += 1
+
+        config.logger.info(
+            f"Справочник районов собран: населенных пунктов {len(towns)}, индексов {len(postcodes)}, "
+            f"адресов из кэша {learned}, улиц {len(resolver._streets)}, "
+            f"домов {sum(len(houses) for houses in resolver._streets.values())}"
+        )
+        return resolver
+
+    @staticmethod
+    def _get_unambiguous(counter: Optional[Counter]) -> Optional[str]:
+        """Район, если все наблюдения согласны"""
+        if not counter or len(counter) != 1:
+            return None
+
+        return next(iter(counter))
+
+    def learn(self, address: str, district: str):
+        """Запоминает дом адреса, район которого определил 2GIS"""
+        if not district:
+            return
+
+        key = normalize_address(address)
+        postcode = _POSTCODE_PATTERN.search(address)
+        if not _is_city_address(key, postcode.group(1) if postcode else None):
+            return
+
+        street = get_street_key(key)
+        house = get_house_number(key)
+        if street is None or house is None:
+            return
+
+        with self._lock:
+            self._streets[street][house][district] += 1
+
+    def _get_house_district(self, street: Optional[str], house: Optional[int]) -> Optional[str]:
+        """Район дома по ранее определенным домам улицы. Вызывается под блокировкой.
+
+        Дом вне известного диапазона не определяется: граница района может проходить за ним
+        """
+        houses = self._streets.get(street) if street is not None and house is not None else None
+        if not houses:
+            return None
+
+        if house in houses:
+            return self._get_unambiguous(houses[house])
+
+        # Ближайшие известные дома той же стороны улицы (четные/нечетные) слева и справа
+        side = sorted(num for num in houses if num % 2 == house % 2)
+        pos = bisect_left(side, house)
+        if pos == 0 or pos == len(side):
+            return None
+
+        lower, upper = houses[side[pos - 1]], houses[side[pos]]
+        district = self._get_unambiguous(lower)
+        if district is None or district != self._get_unambiguous(upper):
+            return None
+
+        observations = sum(lower.values()) + sum(upper.values())
+        return district if observations >= self.min_observations else None
+
+    def _get_town_district(self, key: str) -> Optional[str]:
+        """Район по населенному пункту из справочника. Одноименные улицы не учитываются"""
+        if self._town_pattern is None:
+            return None
+
+        for town in self._town_pattern.finditer(key):
+            if _is_settlement(key, town.start(), town.end()):
+                return self.towns[town.group(1)]
+
+        return None
+
+    def resolve(self, address: str) -> Optional[str]:
+        """Район для адреса в Санкт-Петербурге или None, если офлайн его не определить"""
+        key = normalize_address(address)
+        postcode_match = _POSTCODE_PATTERN.search(address)
+        postcode = postcode_match.group(1) if postcode_match else None
+
+        if not _is_city_address(key, postcode):
+            return None
+
+        # Только индексы из справочника: городские индексы пересекают границы районов
+        postcode_district = self.postcodes.get(postcode)
+
+        town_district = self._get_town_district(key)
+        if town_district is not None:
+            # Индекс другого района: адрес неоднозначен, его определит 2GIS
+            if postcode_district is not None and postcode_district != town_district:
+                return None
+
+            return town_district
+
+        if postcode_district is not None:
+            return postcode_district
+
+        with self._lock:
+            return self._get_house_district(get_street_key(key), get_house_number(key))
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_district_resolver() -> DistrictResolver:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = DistrictResolver.build(
+                seed_path=SEED_PATH,
+                known=get_geocode_cache().get_items(),
+                min_observations=config.DISTRICT_STREET_MIN_OBSERVATIONS
+            )
+
+    return _instance
@@ -11,6 +11,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium_stealth import stealth
 # Внутренние модули
+from app.parsers.user_agents import get_user_agent_provider
 from app.settings.config import get_config
 
 
@@ -22,6 +23,7 @@ class SeleniumCookieManager:
         self.headless = headless
         self.driver = None
         self.session = requests.Session()
+        self.user_agent = get_user_agent_provider().random()
 
     def setting_options(self):
         config.logger.info("Настраиваем парараметры Chrome драйвера")
@@ -41,14 +43,8 @@ class SeleniumCookieManager:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
-        # Случайный user-agent
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        ]
-
-        chrome_options.add_argument(f'--user-agent={random.choice(user_agents)}')
+        # Случайный user-agent из общего набора, с ним же потом ходит requests сессия
+        chrome_options.add_argument(f'--user-agent={self.user_agent}')
 
         config.logger.info("Параметры Chrome драйвера настроены!")
 
@@ -86,7 +82,8 @@ class SeleniumCookieManager:
             wait_for_cookies: list = None,
             timeout: int = 30,
             click_object = "bankruptcy",
-            button_index = None
+            button_index = None,
+            settle_delay: float = 3
     ):
         """
         Получение кук через Selenium с stealth настройками
@@ -111,12 +108,12 @@ class SeleniumCookieManager:
             # Закрываем popup stealth способом
             self.stealth_close_popup()
 
-            time.sleep(3)
+            time.sleep(settle_delay)
 
             self.stealth_click_object(click_object, button_index=button_index)
 
             # Дополнительное время для выполнения JavaScript
-            time.sleep(3)
+            time.sleep(settle_delay)
 
             # Ждем выполнения JavaScript и появления нужных кук
             if wait_for_cookies:
@@ -418,6 +415,7 @@ class SeleniumCookieManager:
                     domain=cookie.get('domain', domain),
                     path=cookie.get('path', '/'),
                     secure=cookie.get('secure', False),
+                    expires=cookie.get('expiry'),
                     rest={'HttpOnly': cookie.get('httpOnly', False)}
                 )
                 self.session.cookies.set_cookie(requests_cookie)
@@ -435,14 +433,28 @@ class SeleniumCookieManager:
         parsed = urlparse(url)
         return parsed.netloc
 
+    def is_alive(self) -> bool:
+        """Отвечает ли браузер на команды"""
+        if not self.driver:
+            return False
+
+        try:
+            _ = self.driver.current_url
+            return True
+
+        except Exception:
+            return False
+
     def get_requests_session(self):
-        """Получить requests сессию с куками"""
+        """Получить requests сессию с куками и user-agent браузера"""
+        self.session.headers["User-Agent"] = self.user_agent
         return self.session
 
     def close(self):
         """Закрытие драйвера"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
             config.logger.info("Chrome драйвер закрыт")
 
 def init_session_with_cookies(url: str, wait_for_cookies: list) -> requests.Session:
@@ -1,15 +1,17 @@
 # Внешние зависимости
 import json
-from typing import Dict, List, Set
-import time
-import random
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 import requests
-from fake_useragent import UserAgent
-from bs4 import BeautifulSoup
 # Внутренние модули
 from app.settings.config import get_config
-from app.utils.gender_detector import RussianGenderDetector
-from app.parsers.get_cookies import init_session_with_cookies
+from app.parsers.cookie_broker import get_cookie_broker
+from app.parsers.respondent_filter import get_respondent_filter
+from app.parsers.search_html import get_backend
+from app.utils.rate_limiter import get_rate_limiter
 
 
 config = get_config()
@@ -18,12 +20,12 @@ config = get_config()
 class Parser:
     URL_POST = "https://kad.arbitr.ru/Kad/SearchInstances"
     URL_GET = "https://kad.arbitr.ru/"
+    HOST = "kad.arbitr.ru"
 
     def __init__(self, date_from: str, date_to: str):
-        self.ua = UserAgent()
+        # User-Agent задает сессия брокера - тот же, с которым получены куки
         self.HEADERS = {
-            "Host": "kad.arbitr.ru",
-            "User-Agent": self.ua.random
+            "Host": "kad.arbitr.ru"
         }
         self.PAYLOAD = {
             "Page": 1,
@@ -37,23 +39,38 @@ class Parser:
             "WithVKSInstances": False,
             "CaseType": "B"
         }
-        self.session = init_session_with_cookies(
-            url="https://kad.arbitr.ru/",
-            wait_for_cookies=['pr_fp', 'rcid', 'wasm']
-        )
+        self.page_limit_reached = False
+        self.cookie_broker = get_cookie_broker()
+        self.session = self.cookie_broker.get_session()
         # self.session = requests.Session()
         # self.set_cookies_from_file(filename=config.COOKIES_FOR_PARSER_PATH)
 
-    def get_data(self) -> str:
+        # Общий для всех парсеров лимит частоты запросов к kad.arbitr.ru
+        self.rate_limiter = get_rate_limiter(
+            name="kad_search",
+            rate=config.SEARCH_RATE_LIMIT,
+            per_host=config.SEARCH_CONCURRENCY
+        )
+
+    def set_date_range(self, date_from: str, date_to: str):
+        """Переключает парсер на другой диапазон дат без новой сессии"""
+        self.PAYLOAD["DateFrom"] = f"{date_from}T00:00:00"
+        self.PAYLOAD["DateTo"] = f"{date_to}T23:59:59"
+        self.PAYLOAD["Page"] = 1
+
+    def get_data(self, page: Optional[int] = None) -> str:
         """Делаем POST запрос и получаем ответ"""
-        config.logger.info("Делаем POST запрос на получение данных")
+        config.logger.info(f"Делаем POST запрос на получение данных (страница {page or self.PAYLOAD['Page']})")
+
+        payload = self.PAYLOAD if page is None else {**self.PAYLOAD, "Page": page}
 
         try:
-            response = self.session.post(
-                url=self.URL_POST,
-                data=self.PAYLOAD,
-                headers=self.HEADERS
-            )
+            response = self._post(payload)
+
+            # Куки устарели: обновляем их и повторяем запрос один раз
+            if self.cookie_broker.is_stale(response):
+                self.cookie_broker.renew(self.session)
+                response = self._post(payload)
 
             response.raise_for_status()
 
@@ -69,6 +86,14 @@ class Parser:
             config.logger.info("Ответ успешно получен!")
             return response.text
 
+    def _post(self, payload: dict) -> requests.Response:
+        with self.rate_limiter.limit(self.HOST):
+            return self.session.post(
+                url=self.URL_POST,
+                data=payload,
+                headers=self.HEADERS
+            )
+
     def set_cookies_from_file(self, filename: str) -> None:
         """Устанавливаем сессионные куки из файла"""
         config.logger.info("Устанавливаем сессионные куки из файла")
@@ -80,107 +105,207 @@ class Parser:
     @staticmethod
     def data_processing(text: str, existing_ids_case: Set[str]) -> List[Dict[str, str]]:
         """Обрабатывает данные"""
+        return Parser.parse_page(text=text, existing_ids_case=existing_ids_case)[0]
+
+    @staticmethod
+    def parse_page(text: str, existing_ids_case: Set[str]) -> Tuple[List[Dict[str, str]], int]:
+        """Обрабатывает данные и возвращает их вместе с кол-вом строк на странице"""
         config.logger.info("Обрабатываем данные")
 
-        detector = RussianGenderDetector()
+        respondent_filter = get_respondent_filter()
         answer = []
 
-        soup = BeautifulSoup(text,"html.parser")
-        rows = soup.find_all('tr')
+        rows, count_rows = get_backend()(text, existing_ids_case)
 
-        for row in rows:
-            td_num = row.find('td', class_='num')
-            bankruptcy = td_num.find('div', class_='bankruptcy')
+        for row in respondent_filter.select(rows):
+            respondent_inn = row["inn"].strip().replace('ИНН: ', '') if row["inn"] is not None else ''
 
-            if bankruptcy is None:
-                continue
+            answer.append({
+                "case": {
+                    "date": row["date"],
+                    "num_case": row["num_case"],
+                    "case_link": row["case_link"]
+                },
+                "respondent": {
+                    "name": row["name"],
+                    "data": row["data"],
+                    "inn": respondent_inn
+                }
+            })
+            print(answer[-1])
 
-            date = bankruptcy.find('span').text.strip()
-            case = td_num.find('a', class_='num_case', href=True)
-            num_case = case.text.strip()
+        return answer, count_rows
 
-            if num_case in existing_ids_case:
-                continue
+    def iter_parse(self, existing_ids_case: Set[str]) -> Iterator[List[Dict[str, str]]]:
+        """Постранично отдает новые данные, загружая несколько страниц параллельно"""
+        config.logger.info("Запускаем парсер")
+        concurrency = max(config.SEARCH_CONCURRENCY, 1)
+        num_page = 1
+        self.page_limit_reached = False
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="SearchPage") as executor:
+            while num_page <= config.SEARCH_MAX_PAGES:
+                pages = range(num_page, min(num_page + concurrency, config.SEARCH_MAX_PAGES + 1))
+                futures = [executor.submit(self.get_data, page) for page in pages]
+                finished = False
+
+                # Страницы разбираем строго по порядку, чтобы сохранить порядок дел
+                for page, future in zip(pages, futures):
+                    try:
+                        text = future.result()
+                        ans, rows_count = self.parse_page(text=text, existing_ids_case=existing_ids_case)
+
+                    except Exception as err:
+                        config.logger.error(f"Произошла ошибка, заканчиваем парсинг! Error: {err}")
+                        finished = True
+                        break
 
-            case_link = case['href']
+                    if rows_count == 0:
+                        config.logger.info(f"Страница {page} пустая, заканчиваем парсинг...")
+                        finished = True
+                        break
 
-            td_respondent = row.find('td', class_='respondent').find('span', class_='js-rollover b-newRollover')
-            respondent_name = td_respondent.find('strong').text.strip()
-            respondent_data = td_respondent.find('br').next_sibling.strip()
+                    for el in ans:
+                        existing_ids_case.add(el["case"]["num_case"])
 
-            if len([char for char in respondent_name if char.isupper()]) != 3:
-                if respondent_name[:2] != "ИП":
-                    continue
+                    if ans:
+                        yield ans
 
-            el_respondent_name = respondent_name.split(" ")
-            if len(el_respondent_name) == 3:
-                fio = respondent_name
+                if finished:
+                    for future in futures:
+                        future.cancel()
+                    break
 
-            elif len(el_respondent_name) == 4:
-                fio = " ".join(el_respondent_name[1:])
+                num_page += concurrency
 
             else:
-                continue
+                config.logger.info(f"Достигнут лимит страниц поиска: {config.SEARCH_MAX_PAGES}")
+                self.page_limit_reached = True
 
-            if not detector.detect_gender_with_fallback(fio=fio):
-                continue
+    def run_parse(self, existing_ids_case: Set[str]) -> List:
+        result = []
+        for ans in self.iter_parse(existing_ids_case):
+            result.extend(ans)
 
-            if respondent_data != "Данные скрыты":
-                if "Санкт-Петербург".lower() not in respondent_data.lower():
-                    continue
+        config.logger.info(f"Получено новых дынных: {len(result)}")
+        return result
 
-            respondent_inn = td_respondent.find('div')
-            respondent_inn = respondent_inn.text.strip().replace('ИНН: ', '') \
-                if respondent_inn is not None else ''
 
-            answer.append({
-                "case": {
-                    "date": date,
-                    "num_case": num_case,
-                    "case_link": case_link
-                },
-                "respondent": {
-                    "name": respondent_name,
-                    "data": respondent_data,
-                    "inn": respondent_inn
-                }
-            })
-            print(answer[-1])
+# Маркер завершения потока-обработчика шардов
+_SHARD_WORKER_DONE = object()
 
-        return answer
 
-    def run_parse(self, existing_ids_case: Set[str]) -> List:
-        config.logger.info("Запускаем парсер")
-        num_page = 1
-        result = []
-        retry_limit = 3
-        retry = 0
+def split_date_range(date_from: str, date_to: str, shard_days: int) -> List[Tuple[str, str]]:
+    """Делит диапазон дат на шарды по shard_days дней, начиная с самых свежих"""
+    start = datetime.strptime(date_from, "%Y-%m-%d").date()
+    end = datetime.strptime(date_to, "%Y-%m-%d").date()
+    shard_days = max(shard_days, 1)
 
-        while True:
-            self.PAYLOAD["Page"] = num_page
+    shards = []
+    while end >= start:
+        shard_start = max(end - timedelta(days=shard_days - 1), start)
+        shards.append((shard_start.isoformat(), end.isoformat()))
+        end = shard_start - timedelta(days=1)
 
-            try:
-                text = self.get_data()
-                ans = self.data_processing(text=text, existing_ids_case=existing_ids_case)
+    return shards
 
-                if len(ans) == 0:
-                    if retry > retry_limit:
-                        config.logger.info("Новых данных нет, заканчиваем парсинг...")
-                        break
-                    retry += 1
-                    config.logger.info(f"Попытка получить данные retry: {retry}")
 
-                for el in ans:
-                    existing_ids_case.add(el["case"]["num_case"])
+def parse_date_range(
+        date_from: str,
+        date_to: str,
+        existing_ids_case: Set[str],
+        stop_event: Optional[threading.Event] = None
+) -> Iterator[List[Dict[str, str]]]:
+    """Параллельно разбирает шарды диапазона дат и отдает новые дела без повторов"""
+    shards = queue.Queue()
+    for shard in split_date_range(date_from, date_to, config.SEARCH_SHARD_DAYS):
+        shards.put(shard)
 
-            except Exception as err:
-                config.logger.error(f"Произошла ошибка, заканчиваем парсинг! Error: {err}")
-                break
+    # Кол-во шардов, которые еще не разобраны (включая разделенные повторно)
+    remaining = [shards.qsize()]
+    remaining_lock = threading.Lock()
 
-            else:
-                result.extend(ans)
-                num_page += 1
-                time.sleep(random.randint(3, 6))
+    results = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
 
-        config.logger.info(f"Получено новых дынных: {len(result)}")
-        return result
\ No newline at end of file
+    def is_stopped() -> bool:
+        return stop.is_set() or (stop_event is not None and stop_event.is_set())
+
+    def worker():
+        parser = None
+
+        try:
+            while not is_stopped():
+                try:
+                    shard_from, shard_to = shards.get(timeout=1)
+
+                except queue.Empty:
+                    with remaining_lock:
+                        if remaining[0] == 0:
+                            break
+                    continue
+
+                config.logger.info(f"Разбираем шард {shard_from} - {shard_to}")
+
+                try:
+                    if parser is None:
+                        parser = Parser(date_from=shard_from, date_to=shard_to)
+                    else:
+                        parser.set_date_range(date_from=shard_from, date_to=shard_to)
+
+                    for page in parser.iter_parse(existing_ids_case):
+                        results.put(page)
+                        if is_stopped():
+                            break
+
+                    # Шард уперся в лимит страниц: делим его пополам и разбираем части заново
+                    if parser.page_limit_reached and shard_from != shard_to:
+                        days = (datetime.strptime(shard_to, "%Y-%m-%d")
+                                - datetime.strptime(shard_from, "%Y-%m-%d")).days + 1
+                        halves = split_date_range(shard_from, shard_to, (days + 1) // 2)
+                        with remaining_lock:
+                            remaining[0] += len(halves)
+                        for half in halves:
+                            shards.put(half)
+
+                    elif parser.page_limit_reached:
+                        config.logger.warning(f"Шард {shard_from} уперся в лимит страниц, часть дел может быть пропущена")
+
+                except Exception as err:
+                    config.logger.error(f"Ошибка разбора шарда {shard_from} - {shard_to}: {err}")
+
+                finally:
+                    with remaining_lock:
+                        remaining[0] -= 1
+
+        finally:
+            results.put(_SHARD_WORKER_DONE)
+
+    workers_count = max(min(config.SEARCH_SHARD_WORKERS, shards.qsize()), 1)
+    for i in range(workers_count):
+        threading.Thread(target=worker, name=f"SearchShard-{i}", daemon=True).start()
+
+    seen = set()
+    done = 0
+    try:
+        while done < workers_count:
+            page = results.get()
+            if page is _SHARD_WORKER_DONE:
+                done += 1
+                continue
+
+            # Одно дело может попасть в несколько шардов
+            page = [el for el in page if el["case"]["num_case"] not in seen]
+            seen.update(el["case"]["num_case"] for el in page)
+
+            if page:
+                yield page
+
+    finally:
+        # Останавливаем потоки и освобождаем их от ожидания в очереди
+        stop.set()
+        while done < workers_count:
+            if results.get() is _SHARD_WORKER_DONE:
+                done += 1
+
+        config.logger.info(f"Разбор диапазона {date_from} - {date_to} завершен. Новых дел: {len(seen)}")
@@ -1,7 +1,15 @@
 # Внешние зависимости
-from typing import Optional
+from concurrent.futures import Future
+from typing import Dict, Optional
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 # Внутренние модули
+from app.parsers.district_resolver import DistrictResolver, get_district_resolver
+from app.storage.geocode_cache import get_geocode_cache, normalize_address
+from app.utils.rate_limiter import get_rate_limiter
 from app.settings.config import get_config
 
 
@@ -9,43 +17,142 @@ config = get_config()
 
 
 class ParserAddress:
-    def __init__(self):
-        pass
+    URL = "https://catalog.api.2gis.com/3.0/items/geocode"
+    HOST = "catalog.api.2gis.com"
 
-    @staticmethod
-    def get_info_for_address(address: str) -> Optional[dict]:
-        url = (f"https://catalog.api.2gis.com/3.0/items/geocode?q={address}&"
-               f"fields=items.adm_div&key={config.GIS_KEY}")
-        config.logger.info(f"Делаем запрос: {url}")
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
+    # Ответы, после которых запрос стоит повторить
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 
-            return response.json()["result"]
+    def __init__(self, pool_size: int = 1):
+        self.cache = get_geocode_cache()
+        self.resolver: Optional[DistrictResolver] = None
 
-        except requests.HTTPError as err:
-            config.logger.error(f"Ошибка запроса к 2GIS. HTTPError: {err}")
+        # Одна сессия с пулом keep-alive соединений на все потоки стадии
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1)))
+        self.rate_limiter = get_rate_limiter("2gis", rate=config.GIS_RATE_LIMIT, per_host=pool_size)
 
-        except Exception as err:
-            config.logger.error(f"Ошибка запроса к 2GIS. Error: {err}")
+        # Запросов к 2GIS за время жизни парсера
+        self.requests_used = 0
+
+        # Один и тот же адрес, который уже определяется в другом потоке, повторно не запрашиваем
+        self._lock = threading.Lock()
+        self._in_progress: Dict[str, Future] = {}
+
+    def _get(self, address: str) -> requests.Response:
+        with self.rate_limiter.limit(self.HOST):
+            with self._lock:
+                self.requests_used += 1
+                config.COUNT_USED_GIS_KEY += 1
+
+            return self.session.get(
+                self.URL,
+                params={"q": address, "fields": "items.adm_div", "key": config.GIS_KEY},
+                timeout=15
+            )
+
+    def get_info_for_address(self, address: str) -> Optional[dict]:
+        config.logger.info(f"Делаем запрос к 2GIS: {address}")
+
+        for attempt in range(1, config.GIS_MAX_ATTEMPTS + 1):
+            try:
+                response = self._get(address)
+
+                if response.status_code in self.RETRY_STATUS_CODES and attempt < config.GIS_MAX_ATTEMPTS:
+                    raise requests.HTTPError(f"{response.status_code} для {address}", response=response)
+
+                response.raise_for_status()
+
+                return response.json()["result"]
+
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as err:
+                status = err.response.status_code if err.response is not None else None
+                if attempt == config.GIS_MAX_ATTEMPTS or (status is not None and status not in self.RETRY_STATUS_CODES):
+                    config.logger.error(f"Ошибка запроса к 2GIS. HTTPError: {err}")
+                    return None
+
+                delay = min(2 ** attempt, 30) * random.uniform(0.5, 1.5)
+                config.logger.warning(f"Ошибка запроса к 2GIS: {err}. Повтор через {delay:.1f} сек")
+                time.sleep(delay)
+
+            except Exception as err:
+                config.logger.error(f"Ошибка запроса к 2GIS. Error: {err}")
+                return None
 
     @staticmethod
     def get_district(info: dict) -> Optional[str]:
         for item in info["items"]:
-            if (item.get("adm_div") is not None 
-                and len(item["adm_div"]) >= 4 
+            if (item.get("adm_div") is not None
+                and len(item["adm_div"]) >= 4
                 and item["adm_div"][3].get("name") is not None):
                     return item["adm_div"][3]["name"]
-        
+
         return None
-            
-    def run(self, address: str) -> Optional[str]:
-        config.COUNT_USED_GIS_KEY += 1
+
+    def warm_cache_from_table(self):
+        """Один раз заполняет пустой кэш районами, уже записанными в таблицу"""
+        if not self.cache.is_empty():
+            return
+
+        # Импорт здесь, чтобы парсер адресов не зависел от gspread без необходимости
+        from app.table.google_table_work import GoogleTable
+
+        try:
+            self.cache.warm(GoogleTable().get_all_data())
+
+        except Exception as err:
+            config.logger.error(f"Ошибка прогрева кэша геокодирования: {err}")
+
+    def _geocode(self, address: str) -> Optional[str]:
         result = self.get_info_for_address(address=address)
         if result is None:
             return None
 
         district = self.get_district(result)
+        self.cache.put(address, district)
+        if self.resolver is not None and district:
+            self.resolver.learn(address, district)
+
+        return district
+
+    def run(self, address: str) -> Optional[str]:
+        district = self.cache.get(address)
+        if district is not None:
+            config.logger.info(f"Район для адреса взят из кэша: {address}")
+            return district or None
+
+        if config.DISTRICT_RESOLVER_ENABLED:
+            # Справочник собирается после прогрева кэша, чтобы учесть уже известные улицы
+            with self._lock:
+                if self.resolver is None:
+                    self.resolver = get_district_resolver()
+
+            district = self.resolver.resolve(address)
+            if district is not None:
+                config.logger.info(f"Район для адреса определен без запроса к 2GIS: {district}")
+                return district
+
+        key = normalize_address(address)
+        with self._lock:
+            future = self._in_progress.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_progress[key] = future
+
+        if not is_owner:
+            config.logger.info(f"Адрес уже определяется в другом потоке: {address}")
+            return future.result()
+
+        try:
+            district = self._geocode(address)
+            future.set_result(district)
+            return district
+
+        except Exception as err:
+            future.set_exception(err)
+            raise
 
-        return district
\ No newline at end of file
+        finally:
+            with self._lock:
+                self._in_progress.pop(key, None)
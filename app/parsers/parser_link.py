@@ -1,11 +1,18 @@
 # Внешние зависимости
-from typing import Optional, Dict
+from typing import Optional
+from urllib.parse import quote, urlparse
+import threading
 import time
+import requests
+from bs4 import BeautifulSoup
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 # Внутренние модули
 from app.parsers.get_cookies import SeleniumCookieManager
+from app.parsers.cookie_broker import get_cookie_broker
+from app.storage.case_store import CaseStore
+from app.utils.rate_limiter import get_rate_limiter
 from app.settings.config import get_config
 
 
@@ -15,6 +22,8 @@ config = get_config()
 class ParserLinks(SeleniumCookieManager):
     def __init__(self, headless: bool = True):
         super().__init__(headless)
+        # Браузер уже получил куки на одной из карточек
+        self.warm = False
 
     def get_pdf_link_after_click(self, timeout: int = 10) -> Optional[str]:
         """Получить только PDF ссылку из появившегося элемента"""
@@ -42,52 +51,219 @@ class ParserLinks(SeleniumCookieManager):
     def run(self, url_card):
         self.get_cookies_with_selenium(
             url=url_card,
-            wait_for_cookies=['pr_fp', 'rcid', 'wasm'],
+            wait_for_cookies=None if self.warm else ['pr_fp', 'rcid', 'wasm'],
             click_object="b-case-chrono-button",
-            button_index=2
+            button_index=2,
+            settle_delay=config.LINKS_SETTLE_DELAY
         )
+        self.warm = True
 
         link_pdf = self.get_pdf_link_after_click()
 
         return link_pdf
 
 
-def parser_link_PDF_from_cards(cards: Dict[str, str]) -> Dict[str, Optional[str]]:
-    result = {}
-    parser = ParserLinks()
-    parser.setup_driver()
-    
-    i = 0
-    data = [(key, value) for key, value in cards.items()]
-    
-    while i < len(cards):
-        id_card, url_card = data[i]
-        try:
-            if i % 10 == 0 and i != 0:
-                parser.close()
-                
-                parser = ParserLinks()
-                parser.setup_driver()
-
-            config.logger.info(f"[{i+1}/{len(cards)}] Поиск ссылки на PDF файл дела {id_card}")
-            link_pdf = parser.run(url_card)
-        
-        except:
-            time.sleep(300)
-            
+class ParserLinksHTTP:
+    """Поиск ссылки на PDF без браузера: те же запросы, что делает страница карточки"""
+    URL_DOCUMENTS = "https://kad.arbitr.ru/Kad/CaseDocumentsPage"
+    URL_PDF = "https://kad.arbitr.ru/Document/Pdf/{case_id}/{document_id}/{file_name}?isAddStamp=True"
+    HOST = "kad.arbitr.ru"
+
+    def __init__(self):
+        # User-Agent задает сессия брокера - тот же, с которым получены куки
+        self.HEADERS = {
+            "Host": "kad.arbitr.ru",
+            "Accept": "application/json, text/javascript, */*",
+            "X-Requested-With": "XMLHttpRequest"
+        }
+        self.cookie_broker = get_cookie_broker()
+        self.session = self.cookie_broker.get_session()
+
+        # Общий для всех потоков поиска ссылок лимит частоты запросов к kad.arbitr.ru
+        self.rate_limiter = get_rate_limiter(
+            name="kad_links",
+            rate=config.LINKS_HTTP_RATE_LIMIT,
+            per_host=config.LINKS_BROWSERS
+        )
+
+    @staticmethod
+    def get_case_id(url_card: str) -> str:
+        """Идентификатор дела из ссылки на карточку"""
+        return urlparse(url_card).path.rstrip("/").split("/")[-1]
+
+    def _get(self, url_card: str, case_id: str) -> requests.Response:
+        with self.rate_limiter.limit(self.HOST):
+            return self.session.get(
+                url=self.URL_DOCUMENTS,
+                params={
+                    "_": int(time.time() * 1000),
+                    "caseId": case_id,
+                    "page": 1,
+                    "perPage": 25
+                },
+                headers={**self.HEADERS, "Referer": url_card},
+                timeout=15
+            )
+
+    def get_documents(self, url_card: str, case_id: str) -> requests.Response:
+        """Делаем запрос на список документов электронного дела"""
+        response = self._get(url_card, case_id)
+
+        # Куки устарели: обновляем их и повторяем запрос один раз
+        if self.cookie_broker.is_stale(response):
+            self.cookie_broker.renew(self.session)
+            response = self._get(url_card, case_id)
+
+        response.raise_for_status()
+
+        return response
+
+    def parse_documents_json(self, data: dict, case_id: str) -> Optional[str]:
+        """Ссылка на первый PDF из JSON ответа"""
+        if not data.get("Success", True):
+            raise ValueError(f"Сервер вернул ошибку: {data.get('Message')}")
+
+        for item in data["Result"]["Items"]:
+            file_name = item.get("FileName") or ""
+            if file_name.lower().endswith(".pdf"):
+                return self.URL_PDF.format(
+                    case_id=item.get("CaseId") or case_id,
+                    document_id=item["Id"],
+                    file_name=quote(file_name)
+                )
+
+        return None
+
+    @staticmethod
+    def parse_documents_html(text: str) -> Optional[str]:
+        """Ссылка на первый PDF из HTML ответа (тот же блок, что читает браузер)"""
+        soup = BeautifulSoup(text, "html.parser")
+        container = soup.find(class_="b-case-chrono-ed")
+        if container is None:
+            raise ValueError("Блок b-case-chrono-ed не найден")
+
+        for link in container.find_all("a", href=True):
+            href = link["href"]
+            if ".pdf" in href.lower():
+                return requests.compat.urljoin("https://kad.arbitr.ru/", href)
+
+        return None
+
+    def run(self, url_card: str) -> Optional[str]:
+        """Возвращает ссылку на PDF или None. Ошибка означает, что ответ не удалось разобрать"""
+        case_id = self.get_case_id(url_card)
+        response = self.get_documents(url_card, case_id)
+
+        content_type = response.headers.get("content-type", "").lower()
+        if "json" in content_type:
+            link_pdf = self.parse_documents_json(response.json(), case_id)
+        else:
+            link_pdf = self.parse_documents_html(response.text)
+
+        if link_pdf:
+            config.logger.info(f"Найдена PDF ссылка (HTTP): {link_pdf}")
         else:
-            result[id_card] = link_pdf
-            i += 1
-    
-    parser.close()
-    
-    return result
-
-
-if __name__ == "__main__":
-    cards = {
-        "А56-93992/2025": "https://kad.arbitr.ru/Card/0e393647-586d-4a59-8a99-85eac1890211",
-        "А56-94250/2025": "https://kad.arbitr.ru/Card/02c4b7c5-9614-4fed-b4ee-921f761c7218"
-    }
-    result = parser_link_PDF_from_cards(cards)
-    print(result)
\ No newline at end of file
+            config.logger.info(f"Ссылка на PDF файл не найдена (HTTP)")
+
+        return link_pdf
+
+
+class ParserLinksWorker:
+    """Браузер из пула: переиспользуется между карточками и пересоздается по состоянию"""
+
+    def __init__(self, stop_event: Optional[threading.Event] = None):
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.parser = None
+        self.http_parser = None
+        self.used = 0
+        self.errors_in_row = 0
+
+    def _find_link_http(self, id_card: str, url_card: str) -> Optional[str]:
+        """Быстрый путь без браузера. Ошибка означает, что нужен браузер"""
+        try:
+            if self.http_parser is None:
+                self.http_parser = ParserLinksHTTP()
+
+            config.logger.info(f"Поиск ссылки на PDF файл дела {id_card} (HTTP)")
+            return self.http_parser.run(url_card)
+
+        except Exception as err:
+            config.logger.warning(f"HTTP поиск ссылки дела {id_card} не удался, используем браузер: {err}")
+            raise
+
+    def _is_healthy(self) -> bool:
+        return (
+            self.used < config.LINKS_BROWSER_MAX_USES
+            and self.errors_in_row < config.LINKS_BROWSER_MAX_ERRORS
+            and self.parser.is_alive()
+        )
+
+    def _get_parser(self) -> ParserLinks:
+        if self.parser is not None and not self._is_healthy():
+            config.logger.info(
+                f"Пересоздаем браузер (карточек: {self.used}, ошибок подряд: {self.errors_in_row})"
+            )
+            self.close()
+
+        if self.parser is None:
+            self.parser = ParserLinks()
+            self.parser.setup_driver()
+            self.used = 0
+
+        return self.parser
+
+    def find_link(self, id_card: str, url_card: str) -> Optional[str]:
+        """Ищет ссылку на PDF с повторами. После LINKS_MAX_ATTEMPTS неудач пробрасывает ошибку"""
+        if config.LINKS_HTTP_MODE:
+            try:
+                return self._find_link_http(id_card, url_card)
+
+            except Exception:
+                pass
+
+        attempt = 0
+
+        while not self.stop_event.is_set():
+            attempt += 1
+
+            try:
+                config.logger.info(f"Поиск ссылки на PDF файл дела {id_card} (попытка {attempt})")
+                link_pdf = self._get_parser().run(url_card)
+
+            except Exception as err:
+                self.errors_in_row += 1
+                config.logger.error(f"Ошибка при поиске ссылки на PDF файл дела {id_card}: {err}")
+
+                if attempt >= config.LINKS_MAX_ATTEMPTS:
+                    raise
+
+                self.stop_event.wait(min(30 * self.errors_in_row, 300))
+
+            else:
+                self.used += 1
+                self.errors_in_row = 0
+                return link_pdf
+
+        return None
+
+    def close(self):
+        if self.parser is not None:
+            try:
+                self.parser.close()
+
+            except Exception as err:
+                config.logger.warning(f"Ошибка закрытия браузера: {err}")
+
+            self.parser = None
+            self.errors_in_row = 0
+
+
+def get_link_checkpoint(store: CaseStore, id_card: str) -> Optional[str]:
+    """Ссылка на PDF, найденная в одном из прошлых запусков"""
+    checkpoint = store.get_checkpoint("link", id_card)
+    return checkpoint.get("link_pdf") if checkpoint else None
+
+
+def save_link_checkpoint(store: CaseStore, id_card: str, link_pdf: Optional[str]):
+    """Сохраняем результат поиска ссылки сразу после обработки карточки"""
+    store.save_checkpoint("link", id_card, {"link_pdf": link_pdf})
@@ -1,14 +1,16 @@
 # Внешние зависимости
 import io
-import re
-from typing import Optional, Dict
-import time
-import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Iterator
+import threading
 import PyPDF2
 import requests
-from fake_useragent import UserAgent
 # Внутренние модули
-from app.parsers.get_cookies import init_session_with_cookies
+from app.parsers.cookie_broker import get_cookie_broker
+from app.parsers.pdf_fields import extract_fields
+from app.storage.case_store import CaseStore
+from app.storage.pdf_cache import get_pdf_cache
 from app.settings.config import get_config
 
 
@@ -17,19 +19,22 @@ config = get_config()
 
 class ParserPDF:
     def __init__(self):
-        self.ua = UserAgent()
+        # User-Agent задает сессия брокера - тот же, с которым получены куки
         self.HEADERS = {
-            "Host": "kad.arbitr.ru",
-            "User-Agent": self.ua.random
+            "Host": "kad.arbitr.ru"
         }
 
-        self.session = init_session_with_cookies(
-            url="https://kad.arbitr.ru/",
-            wait_for_cookies=['pr_fp', 'rcid', 'wasm']
-        )
+        self.cookie_broker = get_cookie_broker()
+        self.session = self.cookie_broker.get_session()
+        self.cache = get_pdf_cache()
 
     def read_pdf_by_url(self, url: str) -> Optional[bytes]:
         """Получаем PDF файл"""
+        content = self.cache.get_content(url)
+        if content is not None:
+            config.logger.info(f"PDF файл взят из кэша: {url}")
+            return content
+
         config.logger.info(f"Делаем запрос к ресурсу: {url}")
         try:
             kwargs_for_requests = {
@@ -45,13 +50,21 @@ class ParserPDF:
                 }
                 
             response = self.session.post(url, **kwargs_for_requests)
+
+            # Куки устарели: обновляем их, следующая попытка пойдет уже с новыми
+            if self.cookie_broker.is_stale(response):
+                self.cookie_broker.renew(self.session)
+
             response.raise_for_status()
 
             content_type = response.headers.get('content-type', '')
             if 'pdf' not in content_type.lower():
                 config.logger.warning(f"Получен не PDF файл. Content-Type: {content_type}")
+                # Вместо PDF обычно отдается страница антибот-проверки
+                self.cookie_broker.renew(self.session)
                 return None
 
+            self.cache.put_content(url, response.content)
             return response.content
 
         except requests.HTTPError as err:
@@ -62,166 +75,192 @@ class ParserPDF:
             config.logger.error(f"Ошибка запроса к PDF файлу. Error: {err}")
             raise
 
-    def _parse_pdf_content(self, pdf_content: bytes) -> Optional[str]:
-        """Парсим содержимое PDF"""
+    @staticmethod
+    def _iter_pdf_pages(pdf_content: bytes, max_pages: int) -> Iterator[str]:
+        """Текст PDF по одной странице: следующая страница извлекается, только если она нужна"""
         config.logger.info("Парсим PDF контент")
 
         try:
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+            pages = pdf_reader.pages
 
-            # Извлекаем текст
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        except Exception as err:
+            raise ValueError(f"Ошибка парсинга PDF: {err}") from err
 
-            config.logger.info(f"PDF прочитан!")
-            return text
+        for num, page in enumerate(pages):
+            if num >= max_pages:
+                config.logger.info(f"Достигнут лимит в {max_pages} стр., остальные страницы не читаем")
+                return
 
-        except Exception as err:
-            config.logger.error(f"Ошибка парсинга PDF: {err}")
-            return None
+            try:
+                yield page.extract_text() + "\n"
+
+            except Exception as err:
+                config.logger.error(f"Ошибка извлечения текста страницы {num + 1}: {err}")
+                return
 
     @staticmethod
     def find_saint_petersburg_string(text: str) -> Optional[str]:
         """Находит строку начинающуюся с 'Санкт-Петербург' и заканчивающуюся на ';' или ')'"""
         config.logger.info("Ищем место жительства в файле")
 
-        search = {}
-        pattern_string_found = r'етербург[^;]*'
-
-        try:
-            # Паттерн для поиска строки от "Санкт" до ";" или ")"
-            for trigger in ("жительства", "адрес", "регистр"):
-                pattern = fr'(?:{trigger})[^;)]*[;)]'
-
-                match = re.search(pattern, text)
-                if match:
-                    found_string = match.group()
-
-                    # Если строка длиннее 90 символов, обрезаем
-                    if len(found_string) > 90:
-                        # Находим начало "Санкт-Петербург" и берем 90 символов
-                        start_pos = match.start()
-                        found_string = text[start_pos:start_pos + 90]
-                        config.logger.info(f"Строка обрезана до 90 символов: {found_string}")
-
-                    else:
-                        config.logger.info(f"Найдена строка: {found_string}")
-
-                    search[trigger] = found_string
-
-            if len(search) == 0:
-                for trigger in ("жительства", "адрес", "регистр"):
-                    # Если не нашли с разделителем, ищем просто начало строки
-                    pattern_start = fr'(?:{trigger})[^;)]*'
-                    match_start = re.search(pattern_start, text)
-                    if match_start:
-                        found_string = match_start.group()
-                        # Обрезаем до 90 символов если нужно
-                        if len(found_string) > 90:
-                            found_string = found_string[:90]
-                            config.logger.info(f"Разделитель не найден, строка обрезана: {found_string}")
-
-                        else:
-                            config.logger.info(f"Разделитель не найден: {found_string}")
-
-                        search[trigger] = found_string
-
-            for trigger, string in search.items():
-                match_found_string = re.search(pattern_string_found, string)
-                if match_found_string:
-                    return string.replace(trigger, '').replace(':', '').strip().replace('\n', '')
-
+        address = extract_fields(text, find_address=True, find_inn=False).address
+        if address is None:
             return None
 
-        except Exception as e:
-            config.logger.error(f"Ошибка поиска строки: {e}")
-            return None
+        config.logger.info(f"Найдена строка: {address}")
+        return address
 
     @staticmethod
     def find_inn_number(text: str) -> Optional[str]:
         """Находит последовательность цифр после слова 'ИНН' в любом регистре"""
         config.logger.info("Ищем ИНН в файле")
 
-        try:
-            # Паттерн: слово ИНН в любом регистре, потом пробелы, потом цифры до первого не-цифрового символа
-            pattern = r'ИНН\s*(\d+)'
-
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                inn_number = match.group(1)
-                config.logger.info(f"Найден ИНН: {inn_number}")
-                return inn_number
-
-            else:
-                config.logger.info("ИНН не найден")
-                return None
-
-        except Exception as e:
-            config.logger.error(f"Ошибка поиска ИНН: {e}")
+        inn = extract_fields(text, find_address=False, find_inn=True).inn
+        if inn is None:
+            config.logger.info("ИНН не найден")
             return None
 
+        config.logger.info(f"Найден ИНН: {inn}")
+        return inn
+
     def run_get_info_from_pfd(
             self,
             url: str,
             find_address: bool = True,
             find_inn: bool = True
     ) -> Dict[str, Optional[str]]:
-        answer = {}
+        info = self.cache.get_info(url, find_address=find_address, find_inn=find_inn)
+        if info is not None:
+            return info
 
         content = self.read_pdf_by_url(url)
-        text = self._parse_pdf_content(content)
-
-        if text is not None:
-            if find_address:
-                address = self.find_saint_petersburg_string(text)
-                answer["address"] = address
-
-            if find_inn:
-                inn = self.find_inn_number(text)
-                answer["inn"] = inn
-        
-        else:
-           raise ValueError("text is None") 
-
-        return answer
-
-
-def parser_PDF_file_from_links(cards: Dict) -> Dict[str, Dict[str, Optional[str]]]:
-    result = {}
-    i = 0
-    card_ids = list(cards.keys())
-    parser = ParserPDF()
-    
-    while i < len(card_ids):
-        id_card = card_ids[i]
-        data = cards[id_card]
-        
-        config.logger.info(f"[{i+1}/{len(cards)}] Поиск информации в PDF файле дела {id_card}")
-        
+        info = self.get_info_from_content(content, find_address=find_address, find_inn=find_inn)
+        self.cache.put_info(url, info)
+
+        return info
+
+    def get_info_from_content(
+            self,
+            content: bytes,
+            find_address: bool = True,
+            find_inn: bool = True
+    ) -> Dict[str, Optional[str]]:
+        """Извлекает адрес и ИНН из уже скачанного PDF файла"""
+        return extract_pdf_info(content, find_address=find_address, find_inn=find_inn)
+
+
+def extract_pdf_info(
+        content: bytes,
+        find_address: bool = True,
+        find_inn: bool = True
+) -> Dict[str, Optional[str]]:
+    """Извлекает адрес и ИНН из PDF файла. Функция верхнего уровня, чтобы ее можно было выполнять в пуле процессов.
+
+    Страницы читаются по одной, чтение прекращается, как только все запрошенные поля найдены окончательно.
+    Поиск идет по всему прочитанному тексту, поэтому поле на стыке страниц находится со следующей страницей.
+    Поле, которое еще может измениться (адрес без разделителя, триггер ниже по приоритету), ищется заново
+    на каждой странице, а на последней прочитанной берется как есть
+    """
+    answer = {key: None for key, needed in (("address", find_address), ("inn", find_inn)) if needed}
+    # Поля, которые следующие страницы еще могут изменить
+    pending = set(answer)
+
+    pages = []
+    for page_text in ParserPDF._iter_pdf_pages(content, max_pages=config.PDF_MAX_PAGES):
+        pages.append(page_text)
+
+        # Адрес и ИНН ищутся одним вызовом по всему прочитанному тексту
+        fields = extract_fields(
+            "".join(pages),
+            find_address="address" in pending,
+            find_inn="inn" in pending
+        )
+        if "address" in pending:
+            answer["address"] = fields.address
+            if fields.address_final:
+                pending.discard("address")
+
+        if "inn" in pending:
+            answer["inn"] = fields.inn
+            if fields.inn_final:
+                pending.discard("inn")
+
+        if not pending:
+            break
+
+    if not pages:
+        raise ValueError("text is None")
+
+    config.logger.info(f"PDF прочитан! Страниц обработано: {len(pages)}")
+    return answer
+
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    """Общий пул процессов для разбора PDF: извлечение текста нагружает CPU и держит GIL"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(max_workers=config.PDF_EXTRACT_WORKERS)
+
+    return _extract_pool
+
+
+def _reset_extract_pool(broken: ProcessPoolExecutor):
+    """Убирает пул, в котором упал процесс: такой пул больше не принимает задачи"""
+    global _extract_pool
+    with _extract_pool_lock:
+        # Пул мог уже пересоздать другой поток
+        if _extract_pool is broken:
+            _extract_pool = None
+
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def run_extract_pdf_info(content: bytes, find_address: bool, find_inn: bool) -> Dict[str, Optional[str]]:
+    """extract_pdf_info в общем пуле процессов.
+
+    Если процесс пула упал (нехватка памяти, сбой PyPDF2 на поврежденном файле), пул пересоздается
+    и файл разбирается еще раз. Повторное падение на том же файле отдается вызывающему
+    """
+    for attempt in range(2):
+        pool = get_extract_pool()
         try:
-            if i % 10 == 0 and i != 0:
-                parser = ParserPDF()
-            
-            info = parser.run_get_info_from_pfd(
-                url=data["link_pdf"],
-                find_address=data["find_address"],
-                find_inn=data["find_inn"]
-            )
-            result[id_card] = info
-        
-        except ValueError:
-            time.sleep(30)
-            
-        except Exception as err:
-            config.logger.error(f"Ошибка при выгрузке информации из PDF файла: {err}")
-            config.logger.info(f"Ждем 300 секунд...")
-            time.sleep(300)
+            return pool.submit(extract_pdf_info, content, find_address, find_inn).result()
+
+        except BrokenProcessPool:
+            config.logger.error("Процесс разбора PDF завершился аварийно, пул процессов пересоздается")
+            _reset_extract_pool(pool)
+            if attempt:
+                raise
+
+
+def get_pdf_checkpoint(
+        store: CaseStore,
+        id_card: str,
+        link_pdf: str,
+        find_address: bool,
+        find_inn: bool
+) -> Optional[Dict[str, Optional[str]]]:
+    """Информация из PDF, извлеченная в одном из прошлых запусков"""
+    checkpoint = store.get_checkpoint("pdf", id_card)
+    if checkpoint is None or checkpoint.get("link_pdf") != link_pdf:
+        return None
+
+    info = checkpoint["info"]
+    if find_address and info.get("address") is None:
+        return None
+
+    if find_inn and info.get("inn") is None:
+        return None
 
-        else:
-            i += 1
-            time.sleep(random.uniform(3, 5))
+    return info
 
-    return result
 
+def save_pdf_checkpoint(store: CaseStore, id_card: str, link_pdf: str, info: Dict[str, Optional[str]]):
+    """Сохраняем извлеченную информацию сразу после обработки PDF файла"""
+    store.save_checkpoint("pdf", id_card, {"link_pdf": link_pdf, "info": info})
@@ -0,0 +1,182 @@
+# Внешние зависимости
+from typing import Coroutine, Dict, Optional
+import asyncio
+import random
+import threading
+import aiohttp
+# Внутренние модули
+from app.parsers.cookie_broker import get_cookie_broker
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+class PDFDownloadError(Exception):
+    """PDF файл не удалось скачать за отведенное число попыток"""
+
+
+class AsyncPDFDownloader:
+    """Асинхронная загрузка PDF: пул keep-alive соединений, ограничение параллельности, повторы с backoff"""
+
+    def __init__(
+            self,
+            concurrency: int,
+            timeout: float,
+            max_attempts: int,
+            backoff_base: float,
+            backoff_max: float
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.HEADERS = {
+            "Host": "kad.arbitr.ru"
+        }
+
+        self.cookie_broker = get_cookie_broker()
+        # requests сессия нужна только как носитель поколения кук для брокера
+        self._cookie_session = None
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._cookies_lock: Optional[asyncio.Lock] = None
+
+        # Собственный цикл событий для вызовов из обычных потоков
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _get_cookies(self) -> Dict[str, str]:
+        return {cookie.name: cookie.value for cookie in self._cookie_session.cookies}
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._cookie_session = await loop.run_in_executor(None, self.cookie_broker.get_session)
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._cookies_lock = asyncio.Lock()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.concurrency,
+                keepalive_timeout=60
+            ),
+            # User-Agent браузера, которым получены куки
+            headers={**self.HEADERS, "User-Agent": self._cookie_session.headers["User-Agent"]},
+            cookies=self._get_cookies()
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _renew_cookies(self, generation: int):
+        """Обновляет куки один раз на поколение, даже если их устаревание заметили несколько загрузок"""
+        async with self._cookies_lock:
+            if getattr(self._cookie_session, "cookie_generation", None) != generation:
+                return
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.cookie_broker.renew, self._cookie_session)
+
+            self._session.cookie_jar.clear()
+            self._session.cookie_jar.update_cookies(self._get_cookies())
+            self._session.headers["User-Agent"] = self._cookie_session.headers["User-Agent"]
+
+    def _get_backoff(self, attempt: int) -> float:
+        """Экспоненциальная задержка со случайным разбросом"""
+        delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _fetch_once(self, url: str) -> bytes:
+        generation = getattr(self._cookie_session, "cookie_generation", None)
+
+        async with self._semaphore:
+            async with self._session.post(
+                url,
+                data={"RecaptchaToken": "undefined"},
+                proxy=config.PROXY,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status in self.cookie_broker.STALE_STATUS_CODES:
+                    await self._renew_cookies(generation)
+
+                response.raise_for_status()
+
+                content_type = response.headers.get('content-type', '')
+                if 'pdf' not in content_type.lower():
+                    # Вместо PDF обычно отдается страница антибот-проверки
+                    await self._renew_cookies(generation)
+                    raise PDFDownloadError(f"Получен не PDF файл. Content-Type: {content_type}")
+
+                return await response.read()
+
+    async def fetch(self, url: str) -> bytes:
+        """Скачивает PDF файл с повторами"""
+        for attempt in range(1, self.max_attempts + 1):
+            config.logger.info(f"Делаем запрос к ресурсу: {url} (попытка {attempt})")
+
+            try:
+                return await self._fetch_once(url)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, PDFDownloadError) as err:
+                if attempt == self.max_attempts:
+                    raise PDFDownloadError(f"Не удалось скачать {url}: {err}") from err
+
+                delay = self._get_backoff(attempt)
+                config.logger.warning(f"Ошибка запроса к PDF файлу: {err}. Повтор через {delay:.1f} сек")
+                await asyncio.sleep(delay)
+
+    def start(self):
+        """Запускает цикл событий в отдельном потоке для вызовов download()"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name="PDFDownloader", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self.open(), loop).result()
+            self._loop = loop
+
+    def _run(self, coroutine: Coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def download(self, url: str) -> bytes:
+        """Синхронная обертка над fetch для потоков конвейера. Цикл событий запускается при первом вызове"""
+        if self._loop is None:
+            self.start()
+
+        return self._run(self.fetch(url))
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        self._run(self.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+
+def create_pdf_downloader() -> AsyncPDFDownloader:
+    return AsyncPDFDownloader(
+        concurrency=config.PDF_CONCURRENCY,
+        timeout=config.PDF_TIMEOUT_SECONDS,
+        max_attempts=config.PDF_MAX_ATTEMPTS,
+        backoff_base=config.PDF_BACKOFF_BASE_SECONDS,
+        backoff_max=config.PDF_BACKOFF_MAX_SECONDS
+    )
@@ -0,0 +1,90 @@
+# Внешние зависимости
+from dataclasses import dataclass
+from typing import Optional
+import re
+
+
+# Слова, после которых в определении суда идет адрес должника (в порядке приоритета)
+ADDRESS_TRIGGERS = ("жительства", "адрес", "регистр")
+
+# Максимальная длина найденной строки адреса
+MAX_ADDRESS_LENGTH = 90
+
+# Признак адреса в Санкт-Петербурге
+CITY_MARKER = "етербург"
+
+# ИНН в любом регистре и цифры после него
+_INN_PATTERN = re.compile(r"ИНН\s*(\d+)", re.IGNORECASE)
+
+# Разделитель, на котором заканчивается адрес
+_DELIMITER_PATTERN = re.compile(r"[;)]")
+
+
+@dataclass
+class PDFFields:
+    """Результат разбора текста определения.
+
+    *_final - поле не изменится, если дописать к тексту следующие страницы
+    """
+    address: Optional[str] = None
+    inn: Optional[str] = None
+    address_final: bool = False
+    inn_final: bool = False
+
+
+def _clean_address(trigger: str, string: str) -> str:
+    return string.replace(trigger, '').replace(':', '').strip().replace('\n', '')
+
+
+def extract_fields(text: str, find_address: bool = True, find_inn: bool = True) -> PDFFields:
+    """Находит адрес в Санкт-Петербурге после слов-триггеров и ИНН.
+
+    Для каждого триггера берется первое вхождение и текст до ближайшего ';' или ')'
+    (не длиннее MAX_ADDRESS_LENGTH). Если ни у одного триггера разделителя дальше нет,
+    берется текст до конца, также с ограничением длины.
+    """
+    fields = PDFFields()
+
+    if find_inn:
+        match = _INN_PATTERN.search(text)
+        if match:
+            fields.inn = match.group(1)
+            # Цифры в самом конце текста могут продолжиться на следующей странице
+            fields.inn_final = match.end(1) < len(text)
+
+    if not find_address:
+        return fields
+
+    # Первое вхождение каждого триггера и конец строки после него.
+    # Поиск подстроки быстрее одного общего regex с альтернативами: у него нет литерального префикса
+    spans = {}
+    for trigger in ADDRESS_TRIGGERS:
+        start = text.find(trigger)
+        if start == -1:
+            continue
+
+        delimiter = _DELIMITER_PATTERN.search(text, start + len(trigger))
+        spans[trigger] = (start, delimiter.end() if delimiter else None)
+
+    has_delimiter = any(end is not None for _, end in spans.values())
+
+    for trigger, (start, end) in spans.items():
+        if has_delimiter:
+            if end is None:
+                continue
+            end = min(end, start + MAX_ADDRESS_LENGTH)
+
+        else:
+            end = min(len(text), start + MAX_ADDRESS_LENGTH)
+
+        string = text[start:end]
+        if CITY_MARKER in string:
+            fields.address = _clean_address(trigger, string)
+            # Следующие страницы не изменят адрес, только если у его триггера и у всех более
+            # приоритетных уже найдены разделители: иначе строку обрезало на конце текста
+            # или приоритетный триггер еще может встретиться дальше
+            priority = ADDRESS_TRIGGERS[:ADDRESS_TRIGGERS.index(trigger) + 1]
+            fields.address_final = all(spans.get(name, (None, None))[1] is not None for name in priority)
+            break
+
+    return fields
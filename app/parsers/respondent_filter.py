@@ -0,0 +1,76 @@
+# Внешние зависимости
+from typing import Dict, List, Optional
+import re
+import threading
+# Внутренние модули
+from app.utils.gender_detector import RussianGenderDetector, get_gender_detector
+
+
+class RespondentFilter:
+    """Отбор ответчиков со страницы поиска.
+
+    Проходят физлица и ИП с ФИО из трех слов, пол которых не женский,
+    с адресом в Санкт-Петербурге или скрытыми данными
+    """
+    HIDDEN_DATA = "Данные скрыты"
+    INDIVIDUAL_PREFIX = "ИП"
+
+    _CITY_PATTERN = re.compile("санкт-петербург", re.IGNORECASE)
+
+    def __init__(self, detector: RussianGenderDetector):
+        self.detector = detector
+
+    def get_fio(self, name: str) -> Optional[str]:
+        """ФИО ответчика-физлица или ИП, None для организаций"""
+        # У физлица три заглавные буквы - по одной в фамилии, имени и отчестве
+        if sum(map(str.isupper, name)) != 3 and not name.startswith(self.INDIVIDUAL_PREFIX):
+            return None
+
+        parts = name.split(" ")
+        if len(parts) == 3:
+            return name
+
+        if len(parts) == 4:
+            return " ".join(parts[1:])
+
+        return None
+
+    def is_suitable_address(self, data: str) -> bool:
+        return data == self.HIDDEN_DATA or self._CITY_PATTERN.search(data) is not None
+
+    def __call__(self, name: str, data: str) -> bool:
+        # Сначала дешевая проверка адреса, пол - только для оставшихся
+        if not self.is_suitable_address(data):
+            return False
+
+        fio = self.get_fio(name)
+        return fio is not None and self.detector.detect_gender_with_fallback(fio=fio)
+
+    def select(self, rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Подходящие строки страницы поиска: пол всех ответчиков определяется одним вызовом"""
+        candidates = []
+        for row in rows:
+            if not self.is_suitable_address(row["data"]):
+                continue
+
+            fio = self.get_fio(row["name"])
+            if fio is not None:
+                candidates.append((row, fio))
+
+        genders = self.detector.detect_gender_batch([fio for _, fio in candidates])
+
+        # Пол не определен - ответчик остается, как в detect_gender_with_fallback
+        return [row for (row, _), gender in zip(candidates, genders) if gender is not False]
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_respondent_filter() -> RespondentFilter:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = RespondentFilter(detector=get_gender_detector())
+
+    return _instance
@@ -0,0 +1,139 @@
+# Внешние зависимости
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from bs4 import BeautifulSoup
+# Внутренние модули
+from app.settings.config import get_config
+
+
+config = get_config()
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+    config.logger.warning("lxml не установлен, страницы поиска разбираются через BeautifulSoup")
+
+
+# Строка результата поиска до фильтров: дело и ответчик
+SearchRow = Dict[str, str]
+
+
+def _has_class(name: str) -> str:
+    """XPath условие как у BeautifulSoup class_=name: класс среди перечисленных в атрибуте"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if etree is not None:
+    _XPATH_ROWS = etree.XPath("//tr")
+    _XPATH_TD_NUM = etree.XPath(f"(.//td[{_has_class('num')}])[1]")
+    _XPATH_BANKRUPTCY = etree.XPath(f"(.//div[{_has_class('bankruptcy')}])[1]")
+    _XPATH_SPAN = etree.XPath("(.//span)[1]")
+    _XPATH_CASE = etree.XPath(f"(.//a[{_has_class('num_case')}][@href])[1]")
+    _XPATH_TD_RESPONDENT = etree.XPath(f"(.//td[{_has_class('respondent')}])[1]")
+    # BeautifulSoup сравнивает составной class_ со всей строкой атрибута
+    _XPATH_ROLLOVER = etree.XPath("(.//span[@class='js-rollover b-newRollover'])[1]")
+    _XPATH_STRONG = etree.XPath("(.//strong)[1]")
+    _XPATH_BR = etree.XPath("(.//br)[1]")
+    _XPATH_DIV = etree.XPath("(.//div)[1]")
+
+    _HTML_PARSER = etree.HTMLParser()
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _text(element) -> str:
+    return "".join(element.itertext())
+
+
+def extract_rows_lxml(text: str, existing_ids_case: Set[str]) -> Tuple[List[SearchRow], int]:
+    """Строки банкротных дел со страницы поиска (lxml и заранее скомпилированные XPath)"""
+    root = etree.fromstring(text, _HTML_PARSER) if text.strip() else None
+    if root is None:
+        return [], 0
+
+    rows = _XPATH_ROWS(root)
+    result = []
+
+    for row in rows:
+        td_num = _first(_XPATH_TD_NUM, row)
+        if td_num is None:
+            continue
+
+        bankruptcy = _first(_XPATH_BANKRUPTCY, td_num)
+        if bankruptcy is None:
+            continue
+
+        case = _first(_XPATH_CASE, td_num)
+        num_case = _text(case).strip()
+
+        if num_case in existing_ids_case:
+            continue
+
+        td_respondent = _first(_XPATH_ROLLOVER, _first(_XPATH_TD_RESPONDENT, row))
+        respondent_inn = _first(_XPATH_DIV, td_respondent)
+
+        result.append({
+            "date": _text(_first(_XPATH_SPAN, bankruptcy)).strip(),
+            "num_case": num_case,
+            "case_link": case.get("href"),
+            "name": _text(_first(_XPATH_STRONG, td_respondent)).strip(),
+            "data": _first(_XPATH_BR, td_respondent).tail.strip(),
+            "inn": _text(respondent_inn) if respondent_inn is not None else None
+        })
+
+    return result, len(rows)
+
+
+def extract_rows_bs4(text: str, existing_ids_case: Set[str]) -> Tuple[List[SearchRow], int]:
+    """Строки банкротных дел со страницы поиска (BeautifulSoup, запасной вариант без lxml)"""
+    soup = BeautifulSoup(text, "html.parser")
+    rows = soup.find_all('tr')
+    result = []
+
+    for row in rows:
+        td_num = row.find('td', class_='num')
+        if td_num is None:
+            continue
+
+        bankruptcy = td_num.find('div', class_='bankruptcy')
+        if bankruptcy is None:
+            continue
+
+        case = td_num.find('a', class_='num_case', href=True)
+        num_case = case.text.strip()
+
+        if num_case in existing_ids_case:
+            continue
+
+        td_respondent = row.find('td', class_='respondent').find('span', class_='js-rollover b-newRollover')
+        respondent_inn = td_respondent.find('div')
+
+        result.append({
+            "date": bankruptcy.find('span').text.strip(),
+            "num_case": num_case,
+            "case_link": case['href'],
+            "name": td_respondent.find('strong').text.strip(),
+            "data": td_respondent.find('br').next_sibling.strip(),
+            "inn": respondent_inn.text if respondent_inn is not None else None
+        })
+
+    return result, len(rows)
+
+
+BACKENDS: Dict[str, Callable[[str, Set[str]], Tuple[List[SearchRow], int]]] = {
+    "lxml": extract_rows_lxml if etree is not None else extract_rows_bs4,
+    "bs4": extract_rows_bs4,
+}
+
+
+def get_backend(name: Optional[str] = None) -> Callable[[str, Set[str]], Tuple[List[SearchRow], int]]:
+    """Разборщик страницы поиска: по умолчанию из SEARCH_HTML_BACKEND, без lxml - BeautifulSoup"""
+    name = name or config.SEARCH_HTML_BACKEND
+
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный разборщик страницы поиска: {name}")
+
+    return BACKENDS[name]
@@ -0,0 +1,35 @@
+# Внешние зависимости
+from typing import List
+import random
+import threading
+
+
+# Тот же Chrome, что и у браузера, получающего куки: stealth настроен под Chrome на Windows/macOS
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+]
+
+
+class UserAgentProvider:
+    """Общий для процесса набор user-agent для браузера и HTTP клиентов"""
+
+    def __init__(self, user_agents: List[str]):
+        self.user_agents = list(user_agents)
+
+    def random(self) -> str:
+        return random.choice(self.user_agents)
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_user_agent_provider() -> UserAgentProvider:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = UserAgentProvider(user_agents=USER_AGENTS)
+
+    return _instance
@@ -0,0 +1,437 @@
+# Внешние зависимости
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Set
+import queue
+import threading
+# Внутренние модули
+from app.parsers.parser import parse_date_range
+from app.parsers.parser_link import ParserLinksWorker, get_link_checkpoint, save_link_checkpoint
+from app.parsers.parser_pdf import get_pdf_checkpoint, run_extract_pdf_info, save_pdf_checkpoint
+from app.parsers.pdf_downloader import AsyncPDFDownloader, create_pdf_downloader
+from app.parsers.parser_address import ParserAddress
+from app.table.google_table_work import GoogleTable
+from app.table.sheet_index import SheetIndex
+from app.table.sheets_writer import SheetsWriter
+from app.storage.case_store import CaseStore, get_case_store
+from app.storage.pdf_cache import get_pdf_cache
+from app.settings.config import get_config
+
+
+config = get_config()
+
+# Маркер конца потока записей между стадиями
+_STOP = object()
+
+HIDDEN_DATA = "Данные скрыты"
+
+
+def _needs_pdf(record: Dict) -> bool:
+    """Нужен ли PDF файл для получения недостающей информации"""
+    respondent = record["respondent"]
+    return respondent["data"] == HIDDEN_DATA or respondent["inn"] == ""
+
+
+def iter_search_records(
+        range_days: int,
+        delta_days: int,
+        existing_ids_case: Set[str],
+        stop_event: threading.Event
+) -> Iterator[Dict]:
+    """Отдает записи дел по мере разбора страниц поиска"""
+    date_to = (datetime.now() - timedelta(days=delta_days)).strftime("%Y-%m-%d")
+    date_from = (datetime.now() - timedelta(days=(range_days + delta_days))).strftime("%Y-%m-%d")
+
+    for page in parse_date_range(date_from, date_to, existing_ids_case, stop_event):
+        for record in page:
+            yield record
+
+        if stop_event.is_set():
+            return
+
+
+class PipelineStage:
+    """Стадия конвейера: потоки-обработчики берут записи из общей входной очереди и передают дальше"""
+
+    def __init__(
+            self,
+            title: str,
+            stage: str,
+            handlers: List,
+            store: CaseStore,
+            in_queue: queue.Queue,
+            out_queue: Optional[queue.Queue],
+            stop_event: threading.Event,
+            notify: Callable[[str], None]
+    ):
+        self.title = title
+        self.stage = stage
+        self.handlers = handlers
+        self.store = store
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stop_event = stop_event
+        self.notify = notify
+
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        self._active_workers = len(handlers)
+        self._threads = [
+            threading.Thread(target=self._run_worker, args=(handler,), name=f"Pipeline-{stage}-{i}", daemon=True)
+            for i, handler in enumerate(handlers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _count(self, dropped: bool = False, failed: bool = False):
+        with self._lock:
+            self.processed += 1
+            if dropped:
+                self.dropped += 1
+            if failed:
+                self.errors += 1
+
+    def _process(self, handler, record: Dict):
+        num_case = record["case"]["num_case"]
+
+        # Стадия уже выполнена в одном из прошлых запусков
+        if self.store.is_done(num_case, self.stage):
+            self._count()
+            if self.out_queue is not None:
+                self.out_queue.put(record)
+            return
+
+        try:
+            result = handler(record)
+
+        except Exception as err:
+            # Ошибка не считается отбраковкой: дело будет повторено в следующем запуске
+            config.logger.error(f"({self.title}) Ошибка обработки дела {num_case}: {err}")
+            self._count(failed=True)
+            return
+
+        if result is None:
+            self._count(dropped=True)
+            if not self.stop_event.is_set():
+                self.store.drop(num_case, self.stage)
+
+        else:
+            self._count()
+            if self.out_queue is not None:
+                self.store.mark_done(result, self.stage)
+                self.out_queue.put(result)
+
+    def _run_worker(self, handler):
+        try:
+            while True:
+                record = self.in_queue.get()
+                if record is _STOP:
+                    # Возвращаем маркер для остальных потоков стадии
+                    self.in_queue.put(_STOP)
+                    break
+
+                # После остановки только вычитываем очередь, чтобы не блокировать предыдущие стадии
+                if self.stop_event.is_set():
+                    continue
+
+                self._process(handler, record)
+
+        finally:
+            try:
+                handler.close()
+
+            except Exception as err:
+                config.logger.error(f"({self.title}) Ошибка завершения стадии: {err}")
+
+            with self._lock:
+                self._active_workers -= 1
+                is_last = self._active_workers == 0
+
+            if is_last:
+                self._finish()
+
+    def _finish(self):
+        if self.out_queue is not None:
+            self.out_queue.put(_STOP)
+
+        config.logger.info(
+            f"({self.title}) Стадия завершена. Обработано: {self.processed}, отброшено: {self.dropped}, "
+            f"ошибок: {self.errors}"
+        )
+        self.notify(
+            f"✅ {self.title}: обработано {self.processed}, отброшено {self.dropped}, ошибок {self.errors}"
+        )
+
+
+class LinkStage:
+    """Поиск ссылки на PDF файл в карточке дела (один браузер из пула)"""
+
+    def __init__(self, store: CaseStore, stop_event: threading.Event):
+        self.store = store
+        self.stop_event = stop_event
+        self.worker = ParserLinksWorker(stop_event=stop_event)
+
+    def __call__(self, record: Dict) -> Optional[Dict]:
+        if not _needs_pdf(record):
+            return record
+
+        case = record["case"]
+        link_pdf = get_link_checkpoint(self.store, case["num_case"])
+
+        if link_pdf is None:
+            link_pdf = self.worker.find_link(case["num_case"], case["case_link"])
+            if self.stop_event.is_set():
+                return None
+
+            save_link_checkpoint(self.store, case["num_case"], link_pdf)
+
+        if link_pdf is None:
+            return None
+
+        case["pdf"] = link_pdf
+        return record
+
+    def close(self):
+        self.worker.close()
+
+
+class PDFStage:
+    """Получение недостающих адреса и ИНН из PDF файла"""
+
+    def __init__(self, store: CaseStore, downloader: AsyncPDFDownloader, stop_event: threading.Event):
+        self.store = store
+        self.downloader = downloader
+        self.stop_event = stop_event
+        self.cache = get_pdf_cache()
+
+    def _get_info(self, id_card: str, link_pdf: str, find_address: bool, find_inn: bool) -> Dict:
+        """Скачивает PDF (повторы с backoff внутри загрузчика) и извлекает из него информацию в пуле процессов.
+
+        Тот же PDF файл из прошлых запусков берется из кэша вместе с уже извлеченными полями
+        """
+        config.logger.info(f"Поиск информации в PDF файле дела {id_card}")
+
+        info = self.cache.get_info(link_pdf, find_address=find_address, find_inn=find_inn)
+        if info is not None:
+            config.logger.info(f"Информация из PDF файла дела {id_card} взята из кэша")
+            return info
+
+        content = self.cache.get_content(link_pdf)
+        if content is None:
+            content = self.downloader.download(link_pdf)
+            self.cache.put_content(link_pdf, content)
+
+        info = run_extract_pdf_info(content, find_address, find_inn)
+        self.cache.put_info(link_pdf, info)
+
+        return info
+
+    def __call__(self, record: Dict) -> Optional[Dict]:
+        case = record["case"]
+        respondent = record["respondent"]
+        if not case.get("pdf"):
+            # Без PDF скрытый адрес взять неоткуда - такое дело в таблицу не пропускаем
+            return None if respondent["data"] == HIDDEN_DATA else record
+
+        find_address = respondent["data"] == HIDDEN_DATA
+        find_inn = respondent["inn"] == ""
+
+        info = get_pdf_checkpoint(self.store, case["num_case"], case["pdf"], find_address, find_inn)
+        if info is None:
+            info = self._get_info(case["num_case"], case["pdf"], find_address, find_inn)
+            save_pdf_checkpoint(self.store, case["num_case"], case["pdf"], info)
+
+        missing_address = info.get("address")
+        missing_inn = info.get("inn")
+
+        if respondent["data"] == HIDDEN_DATA:
+            if missing_address is None:
+                return None
+
+            respondent["data"] = missing_address
+
+        if respondent["inn"] == "" and missing_inn is not None:
+            respondent["inn"] = missing_inn
+
+        return record
+
+    def close(self):
+        pass
+
+
+class DistrictStage:
+    """Определение района по адресу (парсер с пулом соединений и лимитом запросов общий для потоков стадии)"""
+
+    def __init__(self, parser: ParserAddress):
+        self.parser = parser
+
+    def __call__(self, record: Dict) -> Dict:
+        address = record["respondent"]["data"]
+        config.logger.info(f"Получаем район из адреса: {address}")
+
+        district = self.parser.run(address=address)
+        record["respondent"]["district"] = district if district else ""
+
+        return record
+
+    def close(self):
+        pass
+
+
+class TableStage:
+    """Пакетная запись готовых дел в таблицу"""
+
+    def __init__(self, store: CaseStore, batch_size: int):
+        self.store = store
+        self.writer = SheetsWriter(
+            worksheet_num=config.WORKSHEET_NUM,
+            batch_size=batch_size,
+            spool_path=config.SHEETS_SPOOL_PATH,
+            on_written=self._mark_written,
+            on_skipped=self._mark_skipped
+        )
+
+    @property
+    def written(self) -> int:
+        return self.writer.written
+
+    def _mark_written(self, batch: List[Dict]):
+        for el in batch:
+            self.store.mark_done(el, "table")
+
+    def _mark_skipped(self, batch: List[Dict]):
+        # Дела остаются незаписанными и будут возобновлены в следующем запуске по перечитанному индексу
+        SheetIndex(self.store, config.WORKSHEET_NUM).request_full_refresh()
+
+    def use_table(self, table: GoogleTable, row_index: Dict[str, int]):
+        """Берет уже открытую таблицу и известные номера строк, чтобы не читать колонку с номерами дел заново"""
+        self.writer.table = table
+        table.set_row_index(config.WORKSHEET_NUM, row_index)
+
+    def replay_spool(self) -> int:
+        """Дописывает пакеты, которые не удалось записать в прошлых запусках"""
+        return self.writer.replay_spool()
+
+    def __call__(self, record: Dict) -> Dict:
+        # Новые дела дописываются, у уже записанных обновляются только изменившиеся ячейки
+        self.writer.add([record])
+
+        return record
+
+    def close(self):
+        self.writer.flush()
+
+
+class CasePipeline:
+    """Потоковый конвейер: поиск -> ссылка на PDF -> PDF -> район -> таблица"""
+
+    def __init__(
+            self,
+            range_days: int,
+            delta_days: int,
+            file_path: str,
+            stop_event: Optional[threading.Event] = None,
+            notify: Optional[Callable[[str], None]] = None
+    ):
+        self.range_days = range_days
+        self.delta_days = delta_days
+        self.file_path = file_path
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.notify = notify if notify is not None else (lambda message: None)
+
+    def run(self) -> int:
+        """Запускает все стадии и возвращает кол-во дел, дошедших до таблицы"""
+        store = get_case_store()
+        run_started = store.now()
+
+        queues = [queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE) for _ in range(4)]
+        table_stage = TableStage(store=store, batch_size=config.TABLE_BATCH_SIZE)
+        downloader = create_pdf_downloader()
+        address_parser = ParserAddress(pool_size=config.GIS_CONCURRENCY)
+        address_parser.warm_cache_from_table()
+
+        handlers = [
+            (
+                "Шаг 2 (ссылки на PDF)", "link",
+                [LinkStage(store, self.stop_event) for _ in range(config.LINKS_BROWSERS)]
+            ),
+            (
+                "Шаг 3 (недостающая информация)", "pdf",
+                [PDFStage(store, downloader, self.stop_event) for _ in range(config.PDF_CONCURRENCY)]
+            ),
+            (
+                "Шаг 4 (районы)", "district",
+                [DistrictStage(address_parser) for _ in range(config.GIS_CONCURRENCY)]
+            ),
+            ("Шаг 5 (запись в таблицу)", "table", [table_stage]),
+        ]
+
+        stages = []
+        for i, (title, stage, stage_handlers) in enumerate(handlers):
+            out_queue = queues[i + 1] if i + 1 < len(queues) else None
+            stages.append(PipelineStage(
+                title, stage, stage_handlers, store, queues[i], out_queue, self.stop_event, self.notify
+            ))
+
+        # Дела, уже записанные в таблицу (в том числе вручную), не ищем повторно
+        sheet_index = SheetIndex(store, config.WORKSHEET_NUM)
+        sheet_ids = sheet_index.refresh()
+        if sheet_index.table is not None and sheet_ids:
+            table_stage.use_table(sheet_index.table, sheet_ids)
+
+        # До возобновления незавершенных дел: записанные из отложенных пакетов уже не нужно обрабатывать
+        table_stage.replay_spool()
+
+        for stage in stages:
+            stage.start()
+
+        found = 0
+        try:
+            # Сначала досылаем дела, не дошедшие до таблицы в прошлых запусках
+            resumed = 0
+            for record in store.iter_pending():
+                queues[0].put(record)
+                resumed += 1
+
+            if resumed:
+                config.logger.info(f"(Шаг 1) Возобновлено дел из прошлых запусков: {resumed}")
+
+            existing_ids_case = store.get_ids() | set(sheet_ids)
+            for record in iter_search_records(
+                    self.range_days, self.delta_days, existing_ids_case, self.stop_event
+            ):
+                store.add_case(record)
+                queues[0].put(record)
+                found += 1
+
+        except Exception as err:
+            config.logger.error(f"(Шаг 1) Ошибка получения данных: {err}")
+
+        finally:
+            queues[0].put(_STOP)
+            config.logger.info(f"(Шаг 1) Поиск завершен. Найдено дел: {found}")
+            self.notify(f"✅ Шаг 1 (поиск): найдено {found}")
+
+        for stage in stages:
+            stage.join()
+
+        downloader.stop()
+
+        gis_report = (
+            f"2GIS: запросов за запуск {address_parser.requests_used}, "
+            f"всего по ключу {config.COUNT_USED_GIS_KEY}"
+        )
+        config.logger.info(gis_report)
+        self.notify(f"📍 {gis_report}")
+
+        store.export_json(self.file_path, exported_since=run_started)
+
+        return table_stage.written
@@ -30,6 +30,74 @@ class Config:
     
     PROXY: Optional[str] = field(default_factory=lambda: os.getenv("PROXY"))
 
+    PIPELINE_QUEUE_SIZE: int = field(default_factory=lambda: int(os.getenv("PIPELINE_QUEUE_SIZE", 50)))
+    TABLE_BATCH_SIZE: int = field(default_factory=lambda: int(os.getenv("TABLE_BATCH_SIZE", 20)))
+
+    CASE_STORE_PATH: str = field(default_factory=lambda: os.getenv("CASE_STORE_PATH", "cases.db"))
+
+    SEARCH_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv("SEARCH_CONCURRENCY", 3)))
+    SEARCH_RATE_LIMIT: float = field(default_factory=lambda: float(os.getenv("SEARCH_RATE_LIMIT", 0.5)))
+    SEARCH_MAX_PAGES: int = field(default_factory=lambda: int(os.getenv("SEARCH_MAX_PAGES", 40)))
+    SEARCH_SHARD_DAYS: int = field(default_factory=lambda: int(os.getenv("SEARCH_SHARD_DAYS", 1)))
+    SEARCH_SHARD_WORKERS: int = field(default_factory=lambda: int(os.getenv("SEARCH_SHARD_WORKERS", 2)))
+    SEARCH_HTML_BACKEND: str = field(default_factory=lambda: os.getenv("SEARCH_HTML_BACKEND", "lxml"))
+
+    LINKS_BROWSERS: int = field(
+        default_factory=lambda: int(os.getenv("LINKS_BROWSERS", max(1, min(4, (os.cpu_count() or 2) // 2))))
+    )
+    LINKS_BROWSER_MAX_USES: int = field(default_factory=lambda: int(os.getenv("LINKS_BROWSER_MAX_USES", 100)))
+    LINKS_BROWSER_MAX_ERRORS: int = field(default_factory=lambda: int(os.getenv("LINKS_BROWSER_MAX_ERRORS", 2)))
+    LINKS_MAX_ATTEMPTS: int = field(default_factory=lambda: int(os.getenv("LINKS_MAX_ATTEMPTS", 5)))
+    LINKS_SETTLE_DELAY: float = field(default_factory=lambda: float(os.getenv("LINKS_SETTLE_DELAY", 1)))
+    LINKS_HTTP_MODE: bool = field(default_factory=lambda: os.getenv("LINKS_HTTP_MODE", "true").lower() == "true")
+    LINKS_HTTP_RATE_LIMIT: float = field(default_factory=lambda: float(os.getenv("LINKS_HTTP_RATE_LIMIT", 1)))
+
+    PDF_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv("PDF_CONCURRENCY", 4)))
+    PDF_EXTRACT_WORKERS: int = field(
+        default_factory=lambda: int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+    )
+    PDF_MAX_PAGES: int = field(default_factory=lambda: int(os.getenv("PDF_MAX_PAGES", 10)))
+    PDF_TIMEOUT_SECONDS: float = field(default_factory=lambda: float(os.getenv("PDF_TIMEOUT_SECONDS", 30)))
+    PDF_MAX_ATTEMPTS: int = field(default_factory=lambda: int(os.getenv("PDF_MAX_ATTEMPTS", 5)))
+    PDF_BACKOFF_BASE_SECONDS: float = field(default_factory=lambda: float(os.getenv("PDF_BACKOFF_BASE_SECONDS", 5)))
+    PDF_BACKOFF_MAX_SECONDS: float = field(default_factory=lambda: float(os.getenv("PDF_BACKOFF_MAX_SECONDS", 300)))
+
+    PDF_CACHE_DIR: str = field(default_factory=lambda: os.getenv("PDF_CACHE_DIR", "pdf_cache"))
+    PDF_CACHE_MAX_MB: int = field(default_factory=lambda: int(os.getenv("PDF_CACHE_MAX_MB", 500)))
+
+    SHEETS_READ_QUOTA_PER_MINUTE: int = field(
+        default_factory=lambda: int(os.getenv("SHEETS_READ_QUOTA_PER_MINUTE", 60))
+    )
+    SHEETS_WRITE_QUOTA_PER_MINUTE: int = field(
+        default_factory=lambda: int(os.getenv("SHEETS_WRITE_QUOTA_PER_MINUTE", 60))
+    )
+    SHEETS_MAX_ATTEMPTS: int = field(default_factory=lambda: int(os.getenv("SHEETS_MAX_ATTEMPTS", 5)))
+    SHEETS_BACKOFF_BASE_SECONDS: float = field(
+        default_factory=lambda: float(os.getenv("SHEETS_BACKOFF_BASE_SECONDS", 2))
+    )
+    SHEETS_SPOOL_PATH: str = field(default_factory=lambda: os.getenv("SHEETS_SPOOL_PATH", "sheets_spool.jsonl"))
+    SHEET_INDEX_FULL_REFRESH_HOURS: float = field(
+        default_factory=lambda: float(os.getenv("SHEET_INDEX_FULL_REFRESH_HOURS", 24))
+    )
+
+    GIS_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv("GIS_CONCURRENCY", 4)))
+    GIS_RATE_LIMIT: float = field(default_factory=lambda: float(os.getenv("GIS_RATE_LIMIT", 5)))
+    GIS_MAX_ATTEMPTS: int = field(default_factory=lambda: int(os.getenv("GIS_MAX_ATTEMPTS", 3)))
+
+    GEOCODE_CACHE_PATH: str = field(default_factory=lambda: os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.db"))
+    GEOCODE_CACHE_TTL_DAYS: int = field(default_factory=lambda: int(os.getenv("GEOCODE_CACHE_TTL_DAYS", 180)))
+    DISTRICT_RESOLVER_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("DISTRICT_RESOLVER_ENABLED", "true").lower() == "true"
+    )
+    DISTRICT_STREET_MIN_OBSERVATIONS: int = field(
+        default_factory=lambda: int(os.getenv("DISTRICT_STREET_MIN_OBSERVATIONS", 2))
+    )
+
+    COOKIE_TTL_SECONDS: int = field(default_factory=lambda: int(os.getenv("COOKIE_TTL_SECONDS", 1800)))
+    COOKIE_REFRESH_MARGIN_SECONDS: int = field(
+        default_factory=lambda: int(os.getenv("COOKIE_REFRESH_MARGIN_SECONDS", 120))
+    )
+
     logger: logging.Logger = field(init=False)
 
     def __post_init__(self):
@@ -0,0 +1,308 @@
+# Внешние зависимости
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Set
+import json
+import sqlite3
+import threading
+# Внутренние модули
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+class CaseStore:
+    """Локальное хранилище дел (SQLite) с флагами выполнения стадий"""
+
+    # Стадия конвейера -> колонка флага
+    STAGES = {
+        "link": "link_done",
+        "pdf": "pdf_done",
+        "district": "district_done",
+        "table": "table_done"
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cases (
+            num_case TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            case_link TEXT NOT NULL,
+            respondent_name TEXT NOT NULL,
+            respondent_data TEXT NOT NULL,
+            respondent_inn TEXT NOT NULL,
+            link_pdf TEXT,
+            district TEXT,
+            link_done INTEGER NOT NULL DEFAULT 0,
+            pdf_done INTEGER NOT NULL DEFAULT 0,
+            district_done INTEGER NOT NULL DEFAULT 0,
+            table_done INTEGER NOT NULL DEFAULT 0,
+            dropped_at_stage TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            exported_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_cases_pending ON cases (table_done, dropped_at_stage);
+        CREATE INDEX IF NOT EXISTS idx_cases_exported ON cases (exported_at);
+        CREATE TABLE IF NOT EXISTS sheet_ids (
+            worksheet INTEGER NOT NULL,
+            num_case TEXT NOT NULL,
+            row INTEGER NOT NULL,
+            PRIMARY KEY (worksheet, num_case)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            stage TEXT NOT NULL,
+            num_case TEXT NOT NULL,
+            result TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (stage, num_case)
+        );
+    """
+
+    # Стадии, на которых отброшенное дело стоит проверить снова (например, PDF еще не опубликован)
+    RETRY_STAGES = ("link", "pdf")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+        config.logger.info(f"Хранилище дел открыто: {path}")
+
+    @staticmethod
+    def now() -> str:
+        return datetime.now().isoformat(timespec="seconds")
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict:
+        """Строка таблицы -> запись дела в формате конвейера"""
+        case = {
+            "date": row["date"],
+            "num_case": row["num_case"],
+            "case_link": row["case_link"]
+        }
+        if row["link_pdf"]:
+            case["pdf"] = row["link_pdf"]
+
+        respondent = {
+            "name": row["respondent_name"],
+            "data": row["respondent_data"],
+            "inn": row["respondent_inn"]
+        }
+        if row["district_done"]:
+            respondent["district"] = row["district"] or ""
+
+        return {"case": case, "respondent": respondent}
+
+    def add_case(self, record: Dict):
+        """Добавляет дело. Повторно найденное дело снова становится активным.
+
+        Дело, отброшенное на стадии из RETRY_STAGES, проходит конвейер заново: флаги стадий
+        и сохраненные результаты поиска ссылки и разбора PDF сбрасываются
+        """
+        case, respondent = record["case"], record["respondent"]
+        now = self.now()
+        placeholders = ", ".join("?" for _ in self.RETRY_STAGES)
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            row = self._conn.execute(
+                f"""
+                SELECT 1 FROM cases WHERE num_case = ? AND dropped_at_stage IN ({placeholders})
+                """,
+                (case["num_case"], *self.RETRY_STAGES)
+            ).fetchone()
+
+            if row is not None:
+                self._conn.execute(
+                    """
+                    UPDATE cases SET
+                        respondent_data = ?, respondent_inn = ?, link_pdf = NULL, district = NULL,
+                        link_done = 0, pdf_done = 0, district_done = 0, table_done = 0
+                    WHERE num_case = ?
+                    """,
+                    (respondent["data"], respondent["inn"], case["num_case"])
+                )
+                self._conn.execute(
+                    f"DELETE FROM checkpoints WHERE num_case = ? AND stage IN ({placeholders})",
+                    (case["num_case"], *self.RETRY_STAGES)
+                )
+
+            self._conn.execute(
+                """
+                INSERT INTO cases (
+                    num_case, date, case_link, respondent_name, respondent_data, respondent_inn,
+                    created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (num_case) DO UPDATE SET
+                    dropped_at_stage = NULL, updated_at = excluded.updated_at
+                """,
+                (
+                    case["num_case"], case["date"], case["case_link"],
+                    respondent["name"], respondent["data"], respondent["inn"],
+                    now, now
+                )
+            )
+            self._conn.execute("COMMIT")
+
+    def mark_done(self, record: Dict, stage: str):
+        """Сохраняет результат стадии и выставляет ее флаг"""
+        flag = self.STAGES[stage]
+        case, respondent = record["case"], record["respondent"]
+        now = self.now()
+
+        with self._lock:
+            self._conn.execute(
+                f"""
+                UPDATE cases SET
+                    respondent_data = ?, respondent_inn = ?, link_pdf = ?, district = ?,
+                    {flag} = 1, updated_at = ?,
+                    exported_at = CASE WHEN ? = 'table' THEN ? ELSE exported_at END
+                WHERE num_case = ?
+                """,
+                (
+                    respondent["data"], respondent["inn"], case.get("pdf"), respondent.get("district"),
+                    now, stage, now, case["num_case"]
+                )
+            )
+
+    def drop(self, num_case: str, stage: str):
+        """Отмечает дело как отброшенное на стадии"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE cases SET dropped_at_stage = ?, updated_at = ? WHERE num_case = ?",
+                (stage, self.now(), num_case)
+            )
+
+    def is_done(self, num_case: str, stage: str) -> bool:
+        """Выполнена ли стадия для дела"""
+        flag = self.STAGES[stage]
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {flag} FROM cases WHERE num_case = ?", (num_case,)
+            ).fetchone()
+
+        return bool(row and row[0])
+
+    def get_ids(self) -> Set[str]:
+        """Номера известных дел, которые не нужно искать повторно"""
+        placeholders = ", ".join("?" for _ in self.RETRY_STAGES)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT num_case FROM cases
+                WHERE dropped_at_stage IS NULL OR dropped_at_stage NOT IN ({placeholders})
+                """,
+                self.RETRY_STAGES
+            ).fetchall()
+
+        return {row[0] for row in rows}
+
+    def save_checkpoint(self, stage: str, num_case: str, result: Dict):
+        """Сохраняет результат обработки одной карточки"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO checkpoints (stage, num_case, result, updated_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (stage, num_case, json.dumps(result, ensure_ascii=False), self.now())
+            )
+
+    def get_checkpoint(self, stage: str, num_case: str) -> Optional[Dict]:
+        """Результат обработки карточки из прошлого запуска"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM checkpoints WHERE stage = ? AND num_case = ?",
+                (stage, num_case)
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def get_sheet_ids(self, worksheet: int) -> Dict[str, int]:
+        """Локальная копия номеров дел из таблицы: номер дела -> номер строки"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT num_case, row FROM sheet_ids WHERE worksheet = ?", (worksheet,)
+            ).fetchall()
+
+        return {row[0]: row[1] for row in rows}
+
+    def save_sheet_ids(self, worksheet: int, ids: Dict[str, int], replace: bool = False):
+        """Сохраняет номера дел из таблицы. replace - полностью заменить прежний список листа"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            if replace:
+                self._conn.execute("DELETE FROM sheet_ids WHERE worksheet = ?", (worksheet,))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sheet_ids (worksheet, num_case, row) VALUES (?, ?, ?)",
+                [(worksheet, num_case, row) for num_case, row in ids.items()]
+            )
+            self._conn.execute("COMMIT")
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def iter_pending(self) -> Iterator[Dict]:
+        """Дела, не дошедшие до таблицы в прошлых запусках"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM cases
+                WHERE table_done = 0 AND dropped_at_stage IS NULL
+                ORDER BY rowid
+                """
+            ).fetchall()
+
+        for row in rows:
+            yield self._to_record(row)
+
+    def export_json(self, file_path: str, exported_since: Optional[str] = None) -> int:
+        """Выгружает записанные в таблицу дела в json файл"""
+        query = "SELECT * FROM cases WHERE table_done = 1"
+        params = ()
+        if exported_since is not None:
+            query += " AND exported_at >= ?"
+            params = (exported_since,)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY rowid", params).fetchall()
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump([self._to_record(row) for row in rows], f, ensure_ascii=False, indent=4)
+
+        config.logger.info(f"Файл {file_path} успешно перезаписан")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_instance = None
+
+
+def get_case_store() -> CaseStore:
+    global _instance
+    if _instance is None:
+        _instance = CaseStore(path=config.CASE_STORE_PATH)
+
+    return _instance
@@ -0,0 +1,175 @@
+# Внешние зависимости
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import sqlite3
+import threading
+import time
+# Внутренние модули
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+# Сокращения, приводимые к одному виду: полная или сокращенная форма -> ключ
+_ABBREVIATIONS = [
+    (re.compile(r"\b(?:город|гор|г)\b"), "г"),
+    (re.compile(r"\b(?:улица|ул)\b"), "ул"),
+    (re.compile(r"\b(?:проспект|пр-кт|просп|пр)\b"), "пр"),
+    (re.compile(r"\b(?:переулок|пер)\b"), "пер"),
+    (re.compile(r"\b(?:набережная|наб)\b"), "наб"),
+    (re.compile(r"\b(?:бульвар|б-р|бул)\b"), "б-р"),
+    (re.compile(r"\b(?:шоссе|ш)\b"), "ш"),
+    (re.compile(r"\b(?:поселок|пос|п)\b"), "п"),
+    (re.compile(r"\b(?:дом|д)\b"), "д"),
+    (re.compile(r"\b(?:корпус|корп|к)\b"), "к"),
+    (re.compile(r"\b(?:литера|лит)\b"), "лит"),
+    (re.compile(r"\b(?:строение|стр)\b"), "стр"),
+    (re.compile(r"\b(?:спб|с-пб|с-петербург)\b"), "санкт-петербург"),
+]
+
+# Почтовый индекс
+_POSTCODE_PATTERN = re.compile(r"\b\d{6}\b")
+
+# Квартира/помещение на район не влияют, без них разные квартиры одного дома дают один ключ
+_APARTMENT_PATTERN = re.compile(r"\b(?:квартира|кв|комната|комн|помещение|пом)\b\s*\S+")
+
+# "г. Санкт-Петербург" и "Санкт-Петербург" - один город
+_CITY_PREFIX_PATTERN = re.compile(r"\bг санкт-петербург")
+
+_PUNCTUATION_PATTERN = re.compile(r"[.,;:()\"«»]")
+_SPACES_PATTERN = re.compile(r"\s+")
+
+
+def normalize_address(address: str) -> str:
+    """Ключ кэша: регистр, ё, пробелы, сокращения, без индекса и номера квартиры"""
+    key = address.lower().replace("ё", "е")
+    key = _POSTCODE_PATTERN.sub(" ", key)
+    key = _PUNCTUATION_PATTERN.sub(" ", key)
+
+    for pattern, replacement in _ABBREVIATIONS:
+        key = pattern.sub(replacement, key)
+
+    key = _APARTMENT_PATTERN.sub(" ", key)
+
+    key = _SPACES_PATTERN.sub(" ", key).strip()
+
+    return _CITY_PREFIX_PATTERN.sub("санкт-петербург", key)
+
+
+class GeocodeCache:
+    """Постоянный кэш адрес -> район (SQLite). Пустая строка означает, что 2GIS района не нашел"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS geocode (
+            key TEXT PRIMARY KEY,
+            address TEXT NOT NULL,
+            district TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+        config.logger.info(f"Кэш геокодирования открыт: {path}")
+
+    def get(self, address: str) -> Optional[str]:
+        """Район из кэша или None, если адреса нет или запись устарела"""
+        key = normalize_address(address)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT district FROM geocode WHERE key = ? AND updated_at >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return row[0]
+
+    def put(self, address: str, district: Optional[str]):
+        self.put_many([(address, district)])
+
+    def put_many(self, items: Iterable, overwrite: bool = True) -> int:
+        """Сохраняет пары (адрес, район) и возвращает, сколько записей добавлено"""
+        verb = "REPLACE" if overwrite else "IGNORE"
+        now = time.time()
+
+        rows = [(normalize_address(address), address, district or "", now) for address, district in items]
+        rows = [row for row in rows if row[0]]
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR {verb} INTO geocode (key, address, district, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            return self._conn.total_changes - before
+
+    def warm(self, rows: List[List[str]], address_col: int = 5, district_col: int = 6) -> int:
+        """Заполняет кэш из строк таблицы с уже определенными районами. Существующие записи не меняет"""
+        items = [
+            (row[address_col], row[district_col])
+            for row in rows
+            if len(row) > district_col and row[address_col] and row[district_col]
+        ]
+        added = self.put_many(items, overwrite=False)
+        config.logger.info(f"Кэш геокодирования прогрет из таблицы: добавлено {added} адресов")
+
+        return added
+
+    def get_items(self) -> List[Tuple[str, str]]:
+        """Актуальные пары (адрес, район), для которых район известен"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT address, district FROM geocode WHERE district != '' AND updated_at >= ?",
+                (time.time() - self.ttl_seconds,)
+            ).fetchall()
+
+        return [(row[0], row[1]) for row in rows]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM geocode LIMIT 1").fetchone() is None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+        return {"size": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_geocode_cache() -> GeocodeCache:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = GeocodeCache(
+                path=config.GEOCODE_CACHE_PATH,
+                ttl_seconds=config.GEOCODE_CACHE_TTL_DAYS * 24 * 3600
+            )
+
+    return _instance
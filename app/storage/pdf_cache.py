@@ -0,0 +1,187 @@
+# Внешние зависимости
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+# Внутренние модули
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+class PDFCache:
+    """Дисковый кэш PDF файлов: содержимое хранится по sha256, индекс и извлеченные поля - в SQLite.
+
+    Файлы, к которым дольше всего не обращались, удаляются при превышении лимита размера.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            info TEXT NOT NULL DEFAULT '{}',
+            last_used TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON blobs (last_used);
+        CREATE TABLE IF NOT EXISTS urls (
+            url TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_urls_sha256 ON urls (sha256);
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.blobs_dir = self.directory / "blobs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "index.db"), check_same_thread=False, isolation_level=None
+        )
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+        config.logger.info(f"Кэш PDF файлов открыт: {directory}")
+
+    @staticmethod
+    def now() -> str:
+        return datetime.now().isoformat(timespec="microseconds")
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.blobs_dir / sha256[:2] / f"{sha256}.pdf"
+
+    def _get_sha256(self, url: str) -> Optional[str]:
+        """Хэш содержимого по ссылке с отметкой об использовании. Вызывается под блокировкой"""
+        row = self._conn.execute("SELECT sha256 FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+
+        self._conn.execute("UPDATE blobs SET last_used = ? WHERE sha256 = ?", (self.now(), row[0]))
+        return row[0]
+
+    def get_content(self, url: str) -> Optional[bytes]:
+        """Содержимое PDF файла, скачанного ранее по этой ссылке"""
+        with self._lock:
+            sha256 = self._get_sha256(url)
+
+        if sha256 is None:
+            return None
+
+        try:
+            return self._blob_path(sha256).read_bytes()
+
+        except FileNotFoundError:
+            return None
+
+    def put_content(self, url: str, content: bytes) -> str:
+        """Сохраняет PDF файл. Одинаковое содержимое по разным ссылкам хранится один раз"""
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(sha256)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO blobs (sha256, size, last_used) VALUES (?, ?, ?)
+                ON CONFLICT (sha256) DO UPDATE SET last_used = excluded.last_used
+                """,
+                (sha256, len(content), self.now())
+            )
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, sha256) VALUES (?, ?)", (url, sha256))
+            self._evict()
+
+        return sha256
+
+    def get_info(self, url: str, find_address: bool, find_inn: bool) -> Optional[Dict[str, Optional[str]]]:
+        """Поля, уже извлеченные из PDF по этой ссылке, если среди них есть все запрошенные"""
+        with self._lock:
+            sha256 = self._get_sha256(url)
+            if sha256 is None:
+                return None
+
+            row = self._conn.execute("SELECT info FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+
+        if row is None:
+            return None
+
+        info = json.loads(row[0])
+        keys = [key for key, needed in (("address", find_address), ("inn", find_inn)) if needed]
+        if any(key not in info for key in keys):
+            return None
+
+        return {key: info[key] for key in keys}
+
+    def put_info(self, url: str, info: Dict[str, Optional[str]]):
+        """Сохраняет извлеченные из PDF поля вместе с его содержимым"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blobs.sha256, blobs.info FROM urls JOIN blobs USING (sha256) WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return
+
+            merged = json.loads(row[1])
+            merged.update(info)
+            self._conn.execute(
+                "UPDATE blobs SET info = ? WHERE sha256 = ?",
+                (json.dumps(merged, ensure_ascii=False), row[0])
+            )
+
+    def _evict(self):
+        """Удаляет давно не использованные файлы сверх лимита. Вызывается под блокировкой"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT sha256, size FROM blobs ORDER BY last_used").fetchall()
+        evicted = 0
+        for sha256, size in rows:
+            if total <= self.max_bytes:
+                break
+
+            try:
+                self._blob_path(sha256).unlink()
+
+            except FileNotFoundError:
+                pass
+
+            self._conn.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+            self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+            total -= size
+            evicted += 1
+
+        config.logger.info(f"Из кэша PDF удалено файлов: {evicted}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PDFCache:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = PDFCache(
+                directory=config.PDF_CACHE_DIR,
+                max_bytes=config.PDF_CACHE_MAX_MB * 1024 * 1024
+            )
+
+    return _instance
@@ -1,8 +1,14 @@
 # Внешние зависимости
 import json
-from typing import Tuple, Set, List
-from gspread import Client, Spreadsheet, service_account
+import random
+import re
+import time
+from typing import Callable, Dict, Tuple, Set, List
+from gspread import Client, Spreadsheet, Worksheet, service_account
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
 # Внутренние модули
+from app.utils.rate_limiter import get_quota_tracker
 from app.settings.config import get_config
 
 
@@ -10,9 +16,26 @@ config = get_config()
 
 
 class GoogleTable:
+    # Колонка с номером дела - ключ строки
+    KEY_COL = 2
+    KEY_COL_LETTER = "B"
+    # Последняя колонка, которую заполняет build_rows
+    LAST_COL = "G"
+
+    # Превышение квоты и временные ошибки API, после которых запрос стоит повторить
+    RETRY_STATUS_CODES = (429, 500, 502, 503)
+
     def __init__(self):
+        # Квоты Sheets API считаются на проект, поэтому общие для всех экземпляров
+        self.read_quota = get_quota_tracker("sheets_read", limit=config.SHEETS_READ_QUOTA_PER_MINUTE)
+        self.write_quota = get_quota_tracker("sheets_write", limit=config.SHEETS_WRITE_QUOTA_PER_MINUTE)
+
         self.client = self.client_init_json(filename=config.GOOGLE_KEYS_PATH)
-        self.table = self.get_table_by_url(table_url=config.TABLE_URL)
+        self.table = self._call("read", self.get_table_by_url, table_url=config.TABLE_URL)
+
+        self._worksheets: Dict[int, Worksheet] = {}
+        # Номер дела -> номер строки для каждого листа, читается один раз
+        self._row_index: Dict[int, Dict[str, int]] = {}
 
     @staticmethod
     def client_init_json(filename: str) -> Client:
@@ -20,6 +43,25 @@ class GoogleTable:
         config.logger.info("Создаем клиента для работы с Google Sheets")
         return service_account(filename=f"{filename}")
 
+    def _call(self, kind: str, func: Callable, *args, **kwargs):
+        """Запрос к API с учетом минутной квоты чтения/записи и повтором после 429"""
+        quota = self.read_quota if kind == "read" else self.write_quota
+
+        for attempt in range(1, config.SHEETS_MAX_ATTEMPTS + 1):
+            quota.acquire()
+
+            try:
+                return func(*args, **kwargs)
+
+            except APIError as err:
+                status = err.response.status_code if err.response is not None else None
+                if status not in self.RETRY_STATUS_CODES or attempt == config.SHEETS_MAX_ATTEMPTS:
+                    raise
+
+                delay = min(config.SHEETS_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), 120) * random.uniform(0.5, 1.5)
+                config.logger.warning(f"Google Sheets ответил {status}. Повтор через {delay:.1f} сек")
+                time.sleep(delay)
+
     def get_table_by_url(self, table_url: str) -> Spreadsheet:
         """Получение таблицы из Google Sheets по ссылке"""
         config.logger.info("Получаем таблицы из Google Sheets по ссылке")
@@ -29,19 +71,120 @@ class GoogleTable:
         """Возвращает количество листов в таблице и их названия"""
         config.logger.info("Возвращает количество листов в таблице и их названия")
 
-        worksheets = self.table.worksheets()
+        worksheets = self._call("read", self.table.worksheets)
         worksheet_info = {
             "count": len(worksheets),
             "names": [worksheet.title for worksheet in worksheets]
         }
         return worksheet_info
 
+    def get_worksheet(self, worksheet_num: int) -> Worksheet:
+        """Лист по номеру (запрос к API только при первом обращении)"""
+        if worksheet_num not in self._worksheets:
+            self._worksheets[worksheet_num] = self._call("read", self.table.get_worksheet, worksheet_num)
+
+        return self._worksheets[worksheet_num]
+
+    def get_row_index(self, worksheet_num: int) -> Dict[str, int]:
+        """Номер дела -> номер строки. Читается только колонка с номерами дел"""
+        if worksheet_num not in self._row_index:
+            config.logger.info("Получаем номера дел из таблицы")
+            keys = self._call("read", self.get_worksheet(worksheet_num).col_values, self.KEY_COL)
+            self._row_index[worksheet_num] = {key: num for num, key in enumerate(keys, start=1) if key}
+
+        return self._row_index[worksheet_num]
+
+    def set_row_index(self, worksheet_num: int, row_index: Dict[str, int]):
+        """Использовать уже известные номера строк вместо чтения колонки с номерами дел"""
+        self._row_index[worksheet_num] = dict(row_index)
+
+    def get_ids_case_from(self, worksheet_num: int, start_row: int) -> Tuple[Dict[str, int], int]:
+        """Номера дел начиная со строки start_row (читается только колонка B).
+
+        Возвращает (номер дела -> номер строки, номер последней строки с данными)
+        """
+        col = self.KEY_COL_LETTER
+        values = self._call("read", self.get_worksheet(worksheet_num).get, f"{col}{start_row}:{col}")
+
+        ids_case = {}
+        for offset, row in enumerate(values):
+            if row and row[0]:
+                ids_case[row[0]] = start_row + offset
+
+        return ids_case, start_row + len(values) - 1
+
+    @staticmethod
+    def _get_first_row(updated_range: str) -> int:
+        """Первая строка из диапазона вида 'Лист1'!A105:G107"""
+        return int(re.search(r"!\D*(\d+)", updated_range).group(1))
+
+    def sync_data(self, data: list, worksheet_num: int = 0) -> Tuple[int, int, Set[str]]:
+        """Дописывает новые дела и обновляет изменившиеся ячейки уже записанных.
+
+        Читаются только строки, которые есть в data, поэтому число запросов и объем данных
+        зависят от размера изменений, а не от размера листа. Непустые ячейки листа пустыми значениями
+        не затираются. Возвращает (добавлено строк, обновлено ячеек, номера дел, которые не записаны:
+        их строка по индексу уже занята другим делом)
+        """
+        worksheet = self.get_worksheet(worksheet_num)
+        row_index = self.get_row_index(worksheet_num)
+
+        new_rows = []
+        new_keys = set()
+        existing = {}
+        for row in self.build_rows(data):
+            key = str(row[self.KEY_COL - 1])
+            if key in row_index:
+                existing[row_index[key]] = row
+
+            elif key not in new_keys:
+                new_keys.add(key)
+                new_rows.append(row)
+
+        updates = []
+        skipped = set()
+        if existing:
+            row_nums = sorted(existing)
+            current_rows = self._call(
+                "read", worksheet.batch_get, [f"A{num}:{self.LAST_COL}{num}" for num in row_nums]
+            )
+
+            for num, current in zip(row_nums, current_rows):
+                current = current[0] if current else []
+                key = str(existing[num][self.KEY_COL - 1])
+
+                # Индекс строк мог устареть (строки удалили вручную) - чужую строку не трогаем
+                if len(current) < self.KEY_COL or current[self.KEY_COL - 1] != key:
+                    config.logger.warning(f"Строка {num} больше не относится к делу {key}, пропускаем обновление")
+                    skipped.add(key)
+                    continue
+
+                for col, value in enumerate(existing[num], start=1):
+                    value = "" if value is None else str(value)
+                    old_value = current[col - 1] if col <= len(current) else ""
+                    if value and value != old_value:
+                        updates.append({"range": rowcol_to_a1(num, col), "values": [[value]]})
+
+        if updates:
+            self._call("write", worksheet.batch_update, updates)
+            config.logger.info(f"Обновлено ячеек в таблице: {len(updates)}")
+
+        if new_rows:
+            response = self._call("write", worksheet.append_rows, new_rows)
+            first_row = self._get_first_row(response["updates"]["updatedRange"])
+            for offset, row in enumerate(new_rows):
+                row_index[str(row[self.KEY_COL - 1])] = first_row + offset
+
+            config.logger.info(f"Данные успешно дописаны! Кол-во дописанных данных: {len(new_rows)}")
+
+        return len(new_rows), len(updates), skipped
+
     def insert_one(self, title: str, data: list, index: int = 1):
         """Вставка данных в лист"""
         config.logger.info("Вставляем данные в строку")
 
-        worksheet = self.table.worksheet(title)
-        worksheet.insert_row(data, index=index)
+        worksheet = self._call("read", self.table.worksheet, title)
+        self._call("write", worksheet.insert_row, data, index=index)
 
     def insert_data(self, data: list, start_row: int = 2, worksheet_num: int = 0):
         config.logger.info("Вставляем данные в лист")
@@ -56,6 +199,45 @@ class GoogleTable:
             'ИНН'
         ]
 
+        rows = self.build_rows(data)
+
+        worksheet = self.get_worksheet(worksheet_num)
+
+        # Вставляем заголовки если это первая вставка
+        if start_row == 1:
+            self._call("write", worksheet.insert_row, headers, index=start_row)
+            start_row += 1
+
+        try:
+            self._call("write", worksheet.insert_rows, rows, row=start_row)
+
+        except Exception as err:
+            config.logger.error(f"Ошибка! Не удалось вставить. Error: {err}")
+            raise
+
+        else:
+            config.logger.info(f"Данные успешно вставлены! Кол-во вставленных данных: {len(rows)}")
+
+    def append_data(self, data: list, worksheet_num: int = 0):
+        """Дописываем строки в конец листа"""
+        config.logger.info("Дописываем данные в конец листа")
+
+        rows = self.build_rows(data)
+
+        worksheet = self.get_worksheet(worksheet_num)
+
+        try:
+            self._call("write", worksheet.append_rows, rows)
+
+        except Exception as err:
+            config.logger.error(f"Ошибка! Не удалось дописать. Error: {err}")
+            raise
+
+        else:
+            config.logger.info(f"Данные успешно дописаны! Кол-во дописанных данных: {len(rows)}")
+
+    def build_rows(self, data: list) -> List[list]:
+        """Преобразует записи в строки таблицы"""
         config.logger.info("Преобразуем данные -> вложенный словарь в плоский")
 
         flat_data = []
@@ -77,22 +259,7 @@ class GoogleTable:
             ]
             rows.append(row_data)
 
-        worksheet_info = self.get_worksheet_info()
-        worksheet = self.table.worksheet(worksheet_info['names'][worksheet_num])
-
-        # Вставляем заголовки если это первая вставка
-        if start_row == 1:
-            worksheet.insert_row(headers, index=start_row)
-            start_row += 1
-
-        try:
-            worksheet.insert_rows(rows, row=start_row)
-
-        except Exception as err:
-            config.logger.error(f"Ошибка! Не удалось вставить. Error: {err}")
-
-        else:
-            config.logger.info(f"Данные успешно вставлены! Кол-во вставленных данных: {len(rows)}")
+        return rows
 
     def flatten_structure(self, data: dict, parent_key='', sep='_'):
         """Преобразует вложенный словарь в плоский"""
@@ -126,14 +293,7 @@ class GoogleTable:
         """Идентификаторы всех дел из таблицы"""
         config.logger.info("Получаем идентификаторы всех дел из таблицы")
 
-        worksheet_info = self.get_worksheet_info()
-        worksheet = self.table.worksheet(worksheet_info['names'][config.WORKSHEET_NUM])
-
-        all_rows = worksheet.get_all_values()
-
-        ids_case = set()
-        for row in all_rows:
-            ids_case.add(row[1])
+        ids_case = set(self.get_row_index(config.WORKSHEET_NUM))
 
         return len(ids_case), ids_case
 
@@ -162,15 +322,25 @@ class GoogleTable:
         """Вся информация из талицы из таблицы"""
         config.logger.info("Получаем всю информацию из таблицы")
 
-        worksheet_info = self.get_worksheet_info()
-        worksheet = self.table.worksheet(worksheet_info['names'][config.WORKSHEET_NUM])
+        worksheet = self.get_worksheet(config.WORKSHEET_NUM)
 
-        all_rows = worksheet.get_all_values()
+        all_rows = self._call("read", worksheet.get_all_values)
 
         return all_rows
 
     def run_update_table(self, data: List, start_row: int):
-        """Запускаем запись данных"""
+        """Запускаем запись данных: только новые строки и изменившиеся ячейки"""
         config.logger.info("Запускаем запись данных в таблицу")
-        self.clear_all_rows_except_first(start_del_row=start_row, worksheet_num=config.WORKSHEET_NUM)
-        self.insert_data(data=data, start_row=start_row, worksheet_num=config.WORKSHEET_NUM)
\ No newline at end of file
+
+        # Импорт здесь, чтобы избежать циклического импорта
+        from app.table.sheets_writer import SheetsWriter
+
+        writer = SheetsWriter(
+            worksheet_num=config.WORKSHEET_NUM,
+            batch_size=config.TABLE_BATCH_SIZE,
+            spool_path=config.SHEETS_SPOOL_PATH,
+            table=self
+        )
+        writer.replay_spool()
+        writer.add(data)
+        writer.flush()
\ No newline at end of file
@@ -0,0 +1,65 @@
+# Внешние зависимости
+from typing import Dict, Optional
+import time
+# Внутренние модули
+from app.storage.case_store import CaseStore
+from app.table.google_table_work import GoogleTable
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+class SheetIndex:
+    """Локальный индекс номеров дел из таблицы (хранится в CaseStore).
+
+    Обычно дочитываются только строки, добавленные после прошлой синхронизации; полностью
+    колонка перечитывается раз в SHEET_INDEX_FULL_REFRESH_HOURS на случай ручных правок листа
+    """
+
+    def __init__(self, store: CaseStore, worksheet_num: int, table: Optional[GoogleTable] = None):
+        self.store = store
+        self.worksheet_num = worksheet_num
+        self.table = table
+
+    def _meta_key(self, name: str) -> str:
+        return f"sheet_index:{self.worksheet_num}:{name}"
+
+    def request_full_refresh(self):
+        """При следующей синхронизации перечитать колонку целиком (индекс разошелся с листом)"""
+        self.store.set_meta(self._meta_key("full_sync_at"), "0")
+
+    def refresh(self) -> Dict[str, int]:
+        """Синхронизирует индекс с таблицей и возвращает номер дела -> номер строки"""
+        ids_case = self.store.get_sheet_ids(self.worksheet_num)
+        last_row = int(self.store.get_meta(self._meta_key("last_row")) or 0)
+        full_sync_at = float(self.store.get_meta(self._meta_key("full_sync_at")) or 0)
+
+        is_full = not ids_case or time.time() - full_sync_at >= config.SHEET_INDEX_FULL_REFRESH_HOURS * 3600
+        start_row = 1 if is_full else last_row + 1
+
+        try:
+            if self.table is None:
+                self.table = GoogleTable()
+
+            new_ids, new_last_row = self.table.get_ids_case_from(self.worksheet_num, start_row)
+
+        except Exception as err:
+            # Таблица недоступна - работаем с тем, что уже известно локально
+            config.logger.error(f"Ошибка синхронизации номеров дел из таблицы: {err}")
+            return ids_case
+
+        self.store.save_sheet_ids(self.worksheet_num, new_ids, replace=is_full)
+        self.store.set_meta(self._meta_key("last_row"), str(new_last_row))
+        if is_full:
+            self.store.set_meta(self._meta_key("full_sync_at"), str(time.time()))
+            ids_case = new_ids
+
+        else:
+            ids_case.update(new_ids)
+
+        config.logger.info(
+            f"Индекс номеров дел из таблицы {'перечитан' if is_full else 'дополнен'}: "
+            f"новых {len(new_ids)}, всего {len(ids_case)}"
+        )
+        return ids_case
@@ -0,0 +1,126 @@
+# Внешние зависимости
+from typing import Callable, Dict, List, Optional
+import json
+import os
+import threading
+# Внутренние модули
+from app.table.google_table_work import GoogleTable
+from app.settings.config import get_config
+
+
+config = get_config()
+
+
+class SheetsWriter:
+    """Пакетная запись дел в таблицу.
+
+    Записи копятся до batch_size и отправляются одним sync_data (квоты и повторы после 429 - в GoogleTable).
+    Пакет, который так и не удалось записать, сохраняется в JSONL файл и отправляется при следующем запуске.
+    Дела, строку которых в таблице заняло другое дело, записанными не считаются и передаются в on_skipped
+    """
+
+    def __init__(
+            self,
+            worksheet_num: int,
+            batch_size: int,
+            spool_path: str,
+            table: Optional[GoogleTable] = None,
+            on_written: Optional[Callable[[List[Dict]], None]] = None,
+            on_skipped: Optional[Callable[[List[Dict]], None]] = None
+    ):
+        self.worksheet_num = worksheet_num
+        self.batch_size = max(batch_size, 1)
+        self.spool_path = spool_path
+        self.table = table
+        self.on_written = on_written
+        self.on_skipped = on_skipped
+
+        self.buffer: List[Dict] = []
+        self.written = 0
+        self.spooled = 0
+        self.skipped = 0
+
+        self._lock = threading.Lock()
+
+    def _get_table(self) -> GoogleTable:
+        if self.table is None:
+            self.table = GoogleTable()
+
+        return self.table
+
+    def _send(self, batch: List[Dict]) -> bool:
+        try:
+            _, _, skipped_ids = self._get_table().sync_data(data=batch, worksheet_num=self.worksheet_num)
+
+        except Exception as err:
+            config.logger.error(f"Ошибка записи пакета в таблицу ({len(batch)} дел): {err}")
+            return False
+
+        written = [el for el in batch if el["case"]["num_case"] not in skipped_ids]
+        skipped = [el for el in batch if el["case"]["num_case"] in skipped_ids]
+
+        self.written += len(written)
+        if self.on_written is not None and written:
+            self.on_written(written)
+
+        if skipped:
+            self.skipped += len(skipped)
+            config.logger.warning(f"Не записано дел, строки которых заняты другими делами: {len(skipped)}")
+            if self.on_skipped is not None:
+                self.on_skipped(skipped)
+
+        return True
+
+    def _spool(self, batch: List[Dict]):
+        """Сохраняет неотправленный пакет для следующего запуска"""
+        with self._lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(batch, ensure_ascii=False) + "\n")
+
+        self.spooled += len(batch)
+        config.logger.warning(f"Пакет из {len(batch)} дел отложен в {self.spool_path}")
+
+    def _send_or_spool(self, batch: List[Dict]):
+        if not self._send(batch):
+            self._spool(batch)
+
+    def add(self, records: List[Dict]):
+        """Добавляет записи; полные пакеты отправляются сразу"""
+        self.buffer.extend(records)
+
+        while len(self.buffer) >= self.batch_size:
+            batch, self.buffer = self.buffer[:self.batch_size], self.buffer[self.batch_size:]
+            self._send_or_spool(batch)
+
+    def flush(self):
+        """Отправляет все накопленные записи"""
+        while self.buffer:
+            batch, self.buffer = self.buffer[:self.batch_size], self.buffer[self.batch_size:]
+            self._send_or_spool(batch)
+
+    def replay_spool(self) -> int:
+        """Отправляет пакеты, отложенные в прошлых запусках. Возвращает кол-во записанных дел"""
+        with self._lock:
+            if not os.path.exists(self.spool_path):
+                return 0
+
+            with open(self.spool_path, 'r', encoding='utf-8') as f:
+                lines = [line for line in f if line.strip()]
+
+            os.remove(self.spool_path)
+
+        written_before = self.written
+        for line in lines:
+            try:
+                batch = json.loads(line)
+
+            except json.JSONDecodeError as err:
+                config.logger.error(f"Поврежденная строка в {self.spool_path} пропущена: {err}")
+                continue
+
+            self._send_or_spool(batch)
+
+        replayed = self.written - written_before
+        config.logger.info(f"Из отложенных пакетов записано дел: {replayed}")
+
+        return replayed
@@ -1,21 +1,36 @@
-import gender_guesser.detector as gender
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple
+import threading
+
+from app.utils.name_table import get_name_table
 
 
 class RussianGenderDetector:
+    # Сколько пар имя/отчество помнить
+    CACHE_SIZE = 65536
+
     def __init__(self):
-        self.gender_detector = gender.Detector()
+        self.name_table = get_name_table()
 
         # Дополнительные правила для русских имен
-        self.russian_female_endings = ['а', 'я', 'ия', 'ьа']
-        self.russian_male_endings = ['й', 'ь', 'р', 'н', 'л', 'с', 'т', 'в', 'м']
+        self.russian_female_endings = ('а', 'я', 'ия', 'ьа')
+        self.russian_male_endings = ('й', 'ь', 'р', 'н', 'л', 'с', 'т', 'в', 'м')
+
+        # Окончания отчеств
+        self.female_patronymic_endings = ('вна', 'чна')
+        self.male_patronymic_endings = ('вич', 'чич')
 
         # Унисекс имена, которые требуют особой обработки
         self.unisex_names = {
             'женя', 'саша', 'валя', 'слава', 'сима', 'ваня', 'шура'
         }
 
-    def detect_gender(self, fio: str) -> Optional[bool]:
+        # Имена и отчества повторяются из страницы в страницу - пол по ним определяем один раз
+        self.detect_gender_by_names = lru_cache(maxsize=self.CACHE_SIZE)(self._detect_gender_by_names)
+
+    @staticmethod
+    def _split_fio(fio: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Имя и отчество в нижнем регистре или None, если по ФИО пол не определить"""
         if not fio or not isinstance(fio, str):
             return None
 
@@ -24,47 +39,80 @@ class RussianGenderDetector:
         if len(parts) < 2:
             return None
 
+        middle_name = parts[2].lower() if len(parts) >= 3 else None
+
+        return parts[1].lower(), middle_name
+
+    def detect_gender(self, fio: str) -> Optional[bool]:
+        names = self._split_fio(fio)
+        if names is None:
+            return None
+
+        return self.detect_gender_by_names(*names)
+
+    def detect_gender_batch(self, fios: Iterable[str]) -> List[Optional[bool]]:
+        """Пол для списка ФИО за один вызов, результаты совпадают с detect_gender.
+
+        Имена ищутся в таблице одним проходом по отсортированному набору
+        """
+        keys = []
+        for fio in fios:
+            # Как в _split_fio, но одним lower на строку и без разбора хвоста после отчества
+            parts = fio.lower().split(None, 3) if fio and isinstance(fio, str) else ()
+            count = len(parts)
+            keys.append((parts[1], parts[2]) if count > 2 else (parts[1], None) if count == 2 else None)
+
+        # Одинаковые пары имя/отчество определяются один раз
+        unique_keys = set(keys)
+        unique_keys.discard(None)
+
+        table_genders = self.name_table.get_many({first_name for first_name, _ in unique_keys})
+        genders = {
+            key: self._classify(key[0], key[1], table_genders.get)
+            for key in unique_keys
+        }
+        genders[None] = None
+
+        return list(map(genders.__getitem__, keys))
+
+    def _detect_gender_by_names(self, first_name: str, middle_name: Optional[str]) -> Optional[bool]:
+        """Пол по имени и отчеству в нижнем регистре"""
+        return self._classify(first_name, middle_name, self.name_table.get)
+
+    def _classify(
+            self,
+            first_name: str,
+            middle_name: Optional[str],
+            get_name_gender: Callable[[str], Optional[bool]]
+    ) -> Optional[bool]:
         # 0. Проверка на унисекс имена
-        first_name = parts[1].lower()
-        if first_name in self.unisex_names and len(parts) >= 3:
+        if first_name in self.unisex_names and middle_name is not None:
             # Для унисекс имен пол определяем только по отчеству
-            middle_name = parts[2].lower()
-            if middle_name.endswith(('вна', 'чна')):
+            if middle_name.endswith(self.female_patronymic_endings):
                 return False
-            elif middle_name.endswith(('вич', 'чич')):
+            elif middle_name.endswith(self.male_patronymic_endings):
                 return True
             return None
 
         # 1. ПРИОРИТЕТ: Определение по отчеству (95% точность)
-        if len(parts) >= 3:
-            middle_name = parts[2].lower()
-            if middle_name.endswith(('вна', 'чна')):
+        if middle_name is not None:
+            if middle_name.endswith(self.female_patronymic_endings):
                 return False
-            elif middle_name.endswith(('вич', 'чич')):
+            elif middle_name.endswith(self.male_patronymic_endings):
                 return True
 
-        # 2. Библиотека gender-guesser (80-90% точность для русских имен)
-        try:
-            result = self.gender_detector.get_gender(first_name)
-            gender_map = {
-                'male': True,
-                'female': False,
-                'mostly_male': True,
-                'mostly_female': False
-            }
-            detected = gender_map.get(result)
-            if detected is not None and result != 'unknown':
-                return detected
-        except Exception:
-            pass
+        # 2. Таблица русских имен: в том числе мужские на -а/-я и женские на согласную
+        detected = get_name_gender(first_name)
+        if detected is not None:
+            return detected
 
         # 3. Резерв: правила для русских имен (70-80% точность)
         # Женские имена обычно оканчиваются на 'а', 'я'
-        if any(first_name.endswith(ending) for ending in self.russian_female_endings):
+        if first_name.endswith(self.russian_female_endings):
             return False
 
         # Мужские имена обычно оканчиваются на согласные
-        if any(first_name.endswith(ending) for ending in self.russian_male_endings):
+        if first_name.endswith(self.russian_male_endings):
             return True
 
         return None
@@ -74,7 +122,21 @@ class RussianGenderDetector:
         return result if result is not None else default
 
 
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_gender_detector() -> RussianGenderDetector:
+    """Детектор, общий для всего процесса"""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = RussianGenderDetector()
+
+    return _instance
+
+
 if __name__ == "__main__":
-    detector = RussianGenderDetector()
+    detector = get_gender_detector()
     result = detector.detect_gender_with_fallback(fio="Макаровский Ярослав Сергеевич ")
-    print(result)
\ No newline at end of file
+    print(result)
@@ -0,0 +1,169 @@
+"""Компактная таблица пола русских имен.
+
+Исходный список app/data/russian_names.txt собирается в бинарный файл app/data/russian_names.bin:
+отсортированный массив имен в UTF-8, который читается через mmap без загрузки в память процесса.
+
+Сборка после изменения списка:
+    python -m app.utils.name_table
+"""
+# Внешние зависимости
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import mmap
+import os
+import struct
+import threading
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SOURCE_PATH = DATA_DIR / "russian_names.txt"
+TABLE_PATH = DATA_DIR / "russian_names.bin"
+
+# Формат: заголовок (сигнатура, кол-во имен), смещения имен (кол-во + 1), пол по байту на имя, имена подряд
+_MAGIC = b"RNT1"
+_HEADER = struct.Struct("<4sI")
+_OFFSET = struct.Struct("<I")
+
+_GENDERS = {"m": 1, "f": 0}
+
+
+def normalize_name(name: str) -> str:
+    return name.strip().lower().replace("ё", "е")
+
+
+def read_source(path: Path) -> Dict[str, bool]:
+    """Имена из списка: строки "имя m|f", после # - комментарий. True - мужское"""
+    names: Dict[str, bool] = {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for num, line in enumerate(f, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+
+            parts = line.split()
+            if len(parts) != 2 or parts[1] not in _GENDERS:
+                raise ValueError(f"{path}:{num}: ожидается строка вида 'имя m|f', получено: {line}")
+
+            name, is_male = normalize_name(parts[0]), _GENDERS[parts[1]] == 1
+            if names.get(name, is_male) != is_male:
+                raise ValueError(f"{path}:{num}: имя {name} указано с разным полом")
+
+            names[name] = is_male
+
+    return names
+
+
+def build_name_table(source_path: Path = SOURCE_PATH, table_path: Path = TABLE_PATH) -> int:
+    """Собирает бинарную таблицу из списка имен и возвращает кол-во имен"""
+    names = read_source(source_path)
+    # Порядок байтов UTF-8 совпадает с порядком символов - по нему и ищем
+    items = sorted((name.encode("utf-8"), is_male) for name, is_male in names.items())
+
+    offsets, blob = [0], bytearray()
+    for encoded, _ in items:
+        blob += encoded
+        offsets.append(len(blob))
+
+    tmp_path = table_path.with_suffix(".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(items)))
+        f.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+        f.write(bytes(int(is_male) for _, is_male in items))
+        f.write(blob)
+
+    os.replace(tmp_path, table_path)
+
+    return len(items)
+
+
+class NameTable:
+    """Поиск пола по имени двоичным поиском в отображенном в память файле"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} не является таблицей имен")
+
+        self._offsets_start = _HEADER.size
+        self._genders_start = self._offsets_start + (self._count + 1) * _OFFSET.size
+        self._names_start = self._genders_start + self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _get_name(self, index: int) -> bytes:
+        position = self._offsets_start + index * _OFFSET.size
+        start = _OFFSET.unpack_from(self._mm, position)[0]
+        end = _OFFSET.unpack_from(self._mm, position + _OFFSET.size)[0]
+
+        return self._mm[self._names_start + start:self._names_start + end]
+
+    def _bisect(self, key: bytes, low: int = 0) -> int:
+        """Позиция первого имени не меньше key"""
+        high = self._count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def _get_gender(self, key: bytes, index: int) -> Optional[bool]:
+        if index < self._count and self._get_name(index) == key:
+            return self._mm[self._genders_start + index] == 1
+
+        return None
+
+    def get(self, name: str) -> Optional[bool]:
+        """True - мужское имя, False - женское, None - имени нет в таблице"""
+        key = normalize_name(name).encode("utf-8")
+        return self._get_gender(key, self._bisect(key))
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, bool]:
+        """Пол для набора имен (только найденные). Имена ищутся по порядку, каждое - правее предыдущего"""
+        keys = sorted((normalize_name(name).encode("utf-8"), name) for name in set(names))
+        result: Dict[str, bool] = {}
+        low = 0
+
+        for key, name in keys:
+            low = self._bisect(key, low)
+            gender = self._get_gender(key, low)
+            if gender is not None:
+                result[name] = gender
+
+        return result
+
+    def close(self):
+        self._mm.close()
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_name_table() -> NameTable:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            # Таблица поставляется собранной, но без нее не падаем - собираем из списка
+            if not TABLE_PATH.exists():
+                build_name_table()
+
+            _instance = NameTable(TABLE_PATH)
+
+    return _instance
+
+
+if __name__ == "__main__":
+    count = build_name_table()
+    print(f"Таблица имен собрана: {TABLE_PATH} ({count} имен)")
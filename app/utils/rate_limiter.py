@@ -0,0 +1,113 @@
+# Внешние зависимости
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator
+import threading
+import time
+
+
+class RateLimiter:
+    """Общий для потоков ограничитель частоты запросов с лимитом одновременных запросов к хосту"""
+
+    def __init__(self, rate: float, per_host: int = 1):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.per_host = max(per_host, 1)
+
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+        self._host_semaphores: Dict[str, threading.Semaphore] = {}
+
+    def reserve(self) -> float:
+        """Резервирует слот и возвращает, сколько секунд до него ждать"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.interval
+
+        return slot - now
+
+    def wait(self):
+        """Блокирует поток до следующего разрешенного запроса"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _get_host_semaphore(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.Semaphore(self.per_host)
+                self._host_semaphores[host] = semaphore
+
+        return semaphore
+
+    @contextmanager
+    def limit(self, host: str) -> Iterator[None]:
+        """Занимает место в лимите хоста и ждет разрешенного момента для запроса"""
+        with self._get_host_semaphore(host):
+            self.wait()
+            yield
+
+
+class QuotaTracker:
+    """Квота вида "не больше limit запросов за window секунд" (скользящее окно)"""
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self.limit = max(limit, 1)
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._calls: Deque[float] = deque()
+
+    def _get_delay(self) -> float:
+        """Сколько ждать до свободного места в окне. Вызывается под блокировкой"""
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] >= self.window:
+            self._calls.popleft()
+
+        if len(self._calls) < self.limit:
+            self._calls.append(now)
+            return 0.0
+
+        return self._calls[0] + self.window - now
+
+    def acquire(self):
+        """Блокирует поток, пока в окне не освободится место под запрос"""
+        while True:
+            with self._lock:
+                delay = self._get_delay()
+
+            if delay <= 0:
+                return
+
+            time.sleep(delay)
+
+    def used(self) -> int:
+        """Сколько запросов сделано за последнее окно"""
+        with self._lock:
+            now = time.monotonic()
+            return sum(1 for call in self._calls if now - call < self.window)
+
+
+_instances: Dict[str, RateLimiter] = {}
+_instances_lock = threading.Lock()
+
+_quota_trackers: Dict[str, QuotaTracker] = {}
+
+
+def get_rate_limiter(name: str, rate: float, per_host: int = 1) -> RateLimiter:
+    """Ограничитель, общий для всех экземпляров парсеров в процессе"""
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = RateLimiter(rate=rate, per_host=per_host)
+
+        return _instances[name]
+
+
+def get_quota_tracker(name: str, limit: int, window: float = 60.0) -> QuotaTracker:
+    """Квота, общая для всех клиентов API в процессе"""
+    with _instances_lock:
+        if name not in _quota_trackers:
+            _quota_trackers[name] = QuotaTracker(limit=limit, window=window)
+
+        return _quota_trackers[name]
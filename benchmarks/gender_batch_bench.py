@@ -0,0 +1,119 @@
+"""Сравнение определения пола: прежний разбор каждого ФИО, detect_gender (с кэшем) и detect_gender_batch.
+
+Запуск из корня проекта:
+    python -m benchmarks.gender_batch_bench [--size 300000]
+"""
+# Внешние зависимости
+from typing import List, Optional
+import argparse
+import random
+import time
+# Внутренние модули
+from app.utils.gender_detector import RussianGenderDetector
+from app.utils.name_table import SOURCE_PATH, read_source
+
+
+SURNAMES = [
+    "Иванов", "Смирнова", "Кузнецов", "Попова", "Васильев", "Петрова", "Соколов", "Михайлова", "Новиков",
+    "Федорова", "Морозов", "Волкова", "Алексеев", "Лебедева", "Семенов", "Егорова", "Ким", "Цой", "Шевченко"
+]
+PATRONYMICS = [
+    "Александрович", "Сергеевна", "Ильич", "Никитична", "Петрович", "Ивановна", "Кузьмич", "Игоревна",
+    "Рауф", "оглы", "Юрьевич", "Олеговна", ""
+]
+# Имена вне таблицы: на них работают правила по окончаниям
+EXTRA_NAMES = ["Саша", "Женя", "Слава", "Ваня", "Милослава", "Эрнест", "Гюльнара", "Фазиль", "Ли", "Ё"]
+
+
+def legacy_detect_gender(detector: RussianGenderDetector, fio: str) -> Optional[bool]:
+    """Прежняя реализация detect_gender: без кэша, окончания перебираются в цикле"""
+    if not fio or not isinstance(fio, str):
+        return None
+
+    parts = fio.strip().split()
+
+    if len(parts) < 2:
+        return None
+
+    first_name = parts[1].lower()
+    if first_name in detector.unisex_names and len(parts) >= 3:
+        middle_name = parts[2].lower()
+        if middle_name.endswith(('вна', 'чна')):
+            return False
+        elif middle_name.endswith(('вич', 'чич')):
+            return True
+        return None
+
+    if len(parts) >= 3:
+        middle_name = parts[2].lower()
+        if middle_name.endswith(('вна', 'чна')):
+            return False
+        elif middle_name.endswith(('вич', 'чич')):
+            return True
+
+    detected = detector.name_table.get(first_name)
+    if detected is not None:
+        return detected
+
+    if any(first_name.endswith(ending) for ending in detector.russian_female_endings):
+        return False
+
+    if any(first_name.endswith(ending) for ending in detector.russian_male_endings):
+        return True
+
+    return None
+
+
+def make_corpus(size: int, seed: int = 42) -> List[str]:
+    """ФИО с повторами, как в исторических данных: одни и те же имена у разных ответчиков"""
+    first_names = [name.capitalize() for name in read_source(SOURCE_PATH)] + EXTRA_NAMES
+    rnd = random.Random(seed)
+
+    corpus = []
+    for _ in range(size):
+        fio = f"{rnd.choice(SURNAMES)} {rnd.choice(first_names)} {rnd.choice(PATRONYMICS)}"
+        corpus.append(fio.strip() if rnd.random() > 0.01 else rnd.choice(["", "Иванов", "   "]))
+
+    return corpus
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--size", type=int, default=300_000, help="Сколько ФИО в корпусе")
+    args = arg_parser.parse_args()
+
+    corpus = make_corpus(args.size)
+
+    # Отдельные детекторы, чтобы кэш одного пути не ускорял другой
+    legacy_detector = RussianGenderDetector()
+    start = time.perf_counter()
+    legacy = [legacy_detect_gender(legacy_detector, fio) for fio in corpus]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar_detector = RussianGenderDetector()
+    scalar = [scalar_detector.detect_gender(fio) for fio in corpus]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = RussianGenderDetector().detect_gender_batch(corpus)
+    batch_time = time.perf_counter() - start
+
+    # Результаты должны совпадать, иначе сравнение скорости не имеет смысла
+    for name, results in (("detect_gender", scalar), ("detect_gender_batch", batch)):
+        if results != legacy:
+            mismatches = [(fio, a, b) for fio, a, b in zip(corpus, legacy, results) if a != b]
+            raise SystemExit(f"{name}: расхождений {len(mismatches)}, например: {mismatches[:5]}")
+
+    print(f"ФИО в корпусе: {len(corpus)}, уникальных: {len(set(corpus))}")
+    for name, elapsed in (
+            ("Прежний разбор", legacy_time),
+            ("detect_gender", scalar_time),
+            ("detect_gender_batch", batch_time)
+    ):
+        print(f"{name + ':':21}{elapsed:.3f} сек ({elapsed / len(corpus) * 1e6:.2f} мкс на ФИО), "
+              f"ускорение x{legacy_time / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Сравнение прежнего поиска адреса/ИНН (несколько regex на каждый триггер) с extract_fields.
+
+Запуск из корня проекта:
+    python -m benchmarks.pdf_fields_bench [--repeat 200]
+"""
+# Внешние зависимости
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import re
+import timeit
+# Внутренние модули
+from app.parsers.pdf_fields import extract_fields
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "ruling_texts"
+
+
+def legacy_find_saint_petersburg_string(text: str) -> Optional[str]:
+    """Прежняя реализация ParserPDF.find_saint_petersburg_string (без логирования)"""
+    search = {}
+    pattern_string_found = r'етербург[^;]*'
+
+    for trigger in ("жительства", "адрес", "регистр"):
+        pattern = fr'(?:{trigger})[^;)]*[;)]'
+
+        match = re.search(pattern, text)
+        if match:
+            found_string = match.group()
+            if len(found_string) > 90:
+                start_pos = match.start()
+                found_string = text[start_pos:start_pos + 90]
+
+            search[trigger] = found_string
+
+    if len(search) == 0:
+        for trigger in ("жительства", "адрес", "регистр"):
+            pattern_start = fr'(?:{trigger})[^;)]*'
+            match_start = re.search(pattern_start, text)
+            if match_start:
+                found_string = match_start.group()
+                if len(found_string) > 90:
+                    found_string = found_string[:90]
+
+                search[trigger] = found_string
+
+    for trigger, string in search.items():
+        match_found_string = re.search(pattern_string_found, string)
+        if match_found_string:
+            return string.replace(trigger, '').replace(':', '').strip().replace('\n', '')
+
+    return None
+
+
+def legacy_find_inn_number(text: str) -> Optional[str]:
+    """Прежняя реализация ParserPDF.find_inn_number (без логирования)"""
+    match = re.search(r'ИНН\s*(\d+)', text, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def legacy_extract(text: str) -> Dict[str, Optional[str]]:
+    return {"address": legacy_find_saint_petersburg_string(text), "inn": legacy_find_inn_number(text)}
+
+
+def engine_extract(text: str) -> Dict[str, Optional[str]]:
+    fields = extract_fields(text)
+    return {"address": fields.address, "inn": fields.inn}
+
+
+def load_corpus() -> List[str]:
+    return [path.read_text(encoding="utf-8") for path in sorted(FIXTURES_DIR.glob("*.txt"))]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=200, help="Сколько раз прогнать корпус")
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus()
+    if not corpus:
+        raise SystemExit(f"Нет текстов в {FIXTURES_DIR}")
+
+    # Результаты должны совпадать, иначе сравнение скорости не имеет смысла
+    for num, text in enumerate(corpus, start=1):
+        legacy, engine = legacy_extract(text), engine_extract(text)
+        if legacy != engine:
+            raise SystemExit(f"Расхождение на тексте {num}: {legacy} != {engine}")
+
+    def run(extract):
+        for text in corpus:
+            extract(text)
+
+    legacy_time = timeit.timeit(lambda: run(legacy_extract), number=args.repeat)
+    engine_time = timeit.timeit(lambda: run(engine_extract), number=args.repeat)
+
+    total = len(corpus) * args.repeat
+    print(f"Текстов в корпусе: {len(corpus)}, прогонов: {args.repeat}")
+    print(f"Прежний поиск:   {legacy_time:.3f} сек ({legacy_time / total * 1e6:.1f} мкс на текст)")
+    print(f"extract_fields:  {engine_time:.3f} сек ({engine_time / total * 1e6:.1f} мкс на текст)")
+    print(f"Ускорение:       x{legacy_time / engine_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
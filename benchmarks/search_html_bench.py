@@ -0,0 +1,39 @@
+"""Сравнение разбора страницы поиска kad.arbitr.ru через BeautifulSoup и lxml.
+
+Запуск из корня проекта:
+    python -m benchmarks.search_html_bench [--repeat 100]
+"""
+# Внешние зависимости
+from pathlib import Path
+import argparse
+import timeit
+# Внутренние модули
+from app.parsers.search_html import BACKENDS
+
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "search_page.html"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=100, help="Сколько раз разобрать страницу")
+    args = arg_parser.parse_args()
+
+    text = FIXTURE_PATH.read_text(encoding="utf-8")
+
+    # Результаты должны совпадать, иначе сравнение скорости не имеет смысла
+    bs4_result, lxml_result = BACKENDS["bs4"](text, set()), BACKENDS["lxml"](text, set())
+    if bs4_result != lxml_result:
+        raise SystemExit(f"Разборщики расходятся:\n{bs4_result}\n{lxml_result}")
+
+    bs4_time = timeit.timeit(lambda: BACKENDS["bs4"](text, set()), number=args.repeat)
+    lxml_time = timeit.timeit(lambda: BACKENDS["lxml"](text, set()), number=args.repeat)
+
+    print(f"Строк на странице: {bs4_result[1]}, дел о банкротстве: {len(bs4_result[0])}, прогонов: {args.repeat}")
+    print(f"BeautifulSoup: {bs4_time:.3f} сек ({bs4_time / args.repeat * 1e3:.2f} мс на страницу)")
+    print(f"lxml:          {lxml_time:.3f} сек ({lxml_time / args.repeat * 1e3:.2f} мс на страницу)")
+    print(f"Ускорение:     x{bs4_time / lxml_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Время импорта при запуске бота по данным python -X importtime.
+
+Показывает, сколько занимает импорт точки входа, какие пакеты самые тяжелые,
+и проверяет, что парсеры и работа с таблицей не загружаются до первой задачи.
+
+Запуск из корня проекта:
+    python -m benchmarks.startup_importtime [--module app.bot.main] [--repeat 5] [--top 15]
+"""
+# Внешние зависимости
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+import argparse
+import subprocess
+import sys
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Пакеты, которые нужны только задачам, а не самому боту
+LAZY_PACKAGES = [
+    "selenium", "selenium_stealth", "PyPDF2", "bs4", "lxml", "gspread",
+    "app.scheduler.pipeline", "app.parsers", "app.table"
+]
+
+
+def measure(module: str) -> List[Tuple[str, int, int]]:
+    """Строки отчета importtime: (модуль, собственное время, время с вложенными импортами) в мкс"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Импорт {module} завершился с ошибкой:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # заголовок отчета
+
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return rows
+
+
+def group_by_package(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Собственное время импорта, сложенное по пакетам верхнего уровня"""
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    return packages
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--module", default="app.bot.main", help="Точка входа")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Запусков (берется самый быстрый)")
+    arg_parser.add_argument("--top", type=int, default=15, help="Сколько пакетов показать")
+    args = arg_parser.parse_args()
+
+    # Первый запуск компилирует .pyc - в замеры не идет
+    measure(args.module)
+    runs = [measure(args.module) for _ in range(max(args.repeat, 1))]
+    rows = min(runs, key=lambda run: sum(self_us for _, self_us, _ in run))
+
+    total_us = sum(self_us for _, self_us, _ in rows)
+    print(f"Импорт {args.module}: {total_us / 1000:.1f} мс, модулей: {len(rows)} (лучший из {len(runs)} запусков)")
+
+    print("\nСамые тяжелые пакеты:")
+    packages = sorted(group_by_package(rows).items(), key=lambda item: item[1], reverse=True)
+    for package, self_us in packages[:args.top]:
+        print(f"  {package:30} {self_us / 1000:8.1f} мс")
+
+    names = {name for name, _, _ in rows}
+    loaded = sorted(
+        package for package in LAZY_PACKAGES
+        if any(name == package or name.startswith(package + ".") for name in names)
+    )
+    if loaded:
+        raise SystemExit(f"\nПри запуске загружены модули, нужные только задачам: {', '.join(loaded)}")
+
+    print("\nПарсеры и работа с таблицей при запуске не загружаются")
+
+
+if __name__ == "__main__":
+    main()